@@ -0,0 +1,51 @@
+"""Consolidado diário de pedidos
+
+Revision ID: 2adfa2a261fd
+Revises: 840d915c618f
+Create Date: 2026-10-17 13:40:08.671920
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2adfa2a261fd'
+down_revision: Union[str, Sequence[str], None] = '840d915c618f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'status', name='uq_order_daily_stats_day_status')
+    )
+    op.create_index(op.f('ix_order_daily_stats_id'), 'order_daily_stats', ['id'], unique=False)
+
+    # Consolidar os pedidos já existentes
+    op.execute(
+        """
+        INSERT INTO order_daily_stats (day, status, orders_count, revenue, created_at, updated_at)
+        SELECT date(created_at), status, COUNT(id), COALESCE(SUM(total_amount), 0), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM orders
+        WHERE created_at IS NOT NULL AND status IS NOT NULL
+        GROUP BY date(created_at), status
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_order_daily_stats_id'), table_name='order_daily_stats')
+    op.drop_table('order_daily_stats')
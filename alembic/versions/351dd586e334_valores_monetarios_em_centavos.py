@@ -0,0 +1,53 @@
+"""Valores monetários em centavos
+
+Revision ID: 351dd586e334
+Revises: fa0b9efe3c6b
+Create Date: 2026-10-17 02:19:41.629765
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '351dd586e334'
+down_revision: Union[str, Sequence[str], None] = 'fa0b9efe3c6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Colunas de valores (Float em reais -> inteiro em centavos)
+MONEY_COLUMNS = {
+    'items': ('price',),
+    'orders': ('subtotal', 'delivery_fee', 'total_amount'),
+    'order_items': ('unit_price', 'total_price'),
+    'order_daily_stats': ('revenue',),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, columns in MONEY_COLUMNS.items():
+        for column in columns:
+            op.execute(f'UPDATE {table} SET {column} = ROUND({column} * 100) WHERE {column} IS NOT NULL')
+
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    existing_type=sa.Float(),
+                    type_=sa.BigInteger(),
+                    postgresql_using=f'{column}::bigint',
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.BigInteger(), type_=sa.Float())
+
+        for column in columns:
+            op.execute(f'UPDATE {table} SET {column} = {column} / 100.0 WHERE {column} IS NOT NULL')
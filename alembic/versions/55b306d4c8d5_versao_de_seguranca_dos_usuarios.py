@@ -0,0 +1,29 @@
+"""Versão de segurança dos usuários
+
+Revision ID: 55b306d4c8d5
+Revises: 2adfa2a261fd
+Create Date: 2026-10-17 15:02:51.340127
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '55b306d4c8d5'
+down_revision: Union[str, Sequence[str], None] = '2adfa2a261fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('security_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('security_version')
@@ -0,0 +1,52 @@
+"""Índices de pedidos e itens do pedido
+
+Revision ID: 70b7f3d6fe8f
+Revises: f4a7b9af26cb
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '70b7f3d6fe8f'
+down_revision: Union[str, Sequence[str], None] = 'f4a7b9af26cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A estrutura inicial não criou orders.user_id, que o modelo já usa e os índices abaixo precisam
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_orders_user_id_users', 'users', ['user_id'], ['id'])
+
+    # Listagem de pedidos do usuário, com e sem filtro de status
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_orders_user_id_status_created_at', 'orders', ['user_id', 'status', 'created_at', 'id'], unique=False
+    )
+    # Listagem do administrador filtrada por status e estatísticas por período
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_created_at', 'orders', ['created_at', 'id'], unique=False)
+    # Linhas de um pedido / de um item dentro do pedido e uso do item em pedidos
+    op.create_index('ix_order_items_order_id_item_id', 'order_items', ['order_id', 'item_id'], unique=False)
+    op.create_index('ix_order_items_item_id', 'order_items', ['item_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_items_item_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id_item_id', table_name='order_items')
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_user_id_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_constraint('fk_orders_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
@@ -0,0 +1,29 @@
+"""Índice de listagem de usuários
+
+Revision ID: 840d915c618f
+Revises: 70b7f3d6fe8f
+Create Date: 2026-10-17 11:03:27.118342
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '840d915c618f'
+down_revision: Union[str, Sequence[str], None] = '70b7f3d6fe8f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Paginação por cursor de /users/list
+    op.create_index('ix_users_created_at', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at', table_name='users')
@@ -0,0 +1,29 @@
+"""Versão dos pedidos
+
+Revision ID: fa0b9efe3c6b
+Revises: 55b306d4c8d5
+Create Date: 2026-10-17 16:21:37.508213
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'fa0b9efe3c6b'
+down_revision: Union[str, Sequence[str], None] = '55b306d4c8d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('version')
@@ -1,40 +1,100 @@
+# Configurações do backend da API de Pizzaria
 import os
 from pathlib import Path
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Configuração do banco de dados
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./backend/database/database.db')
 
+# Drivers assíncronos usados pela API para cada tipo de banco
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Converte a URL síncrona do banco para a URL do driver assíncrono equivalente
+    (postgresql -> asyncpg, sqlite -> aiosqlite)
+    """
+    url = make_url(database_url)
+    backend_name = url.get_backend_name()
+    if backend_name not in ASYNC_DRIVERS:
+        raise ValueError(f'Tipo de banco não suportado: {database_url}')
+    return url.set(drivername=ASYNC_DRIVERS[backend_name]).render_as_string(hide_password=False)
+
+
+def get_pool_settings() -> dict:
+    """
+    Lê as configurações do pool de conexões das variáveis de ambiente
+    """
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+
+POOL_SETTINGS = get_pool_settings()
+
 # Configuração específica baseada no tipo de banco
 if DATABASE_URL.startswith('postgresql'):
-    # PostgreSQL (Docker/Produção)
-    engine = create_engine(DATABASE_URL, echo=False)
+    # PostgreSQL (Docker/Produção). O pool configurado é só o da API (async_engine); o engine
+    # síncrono é usado na inicialização e nos scripts e não mantém conexões abertas
+    engine = create_engine(DATABASE_URL, echo=False, poolclass=NullPool)
+    async_engine = create_async_engine(get_async_database_url(DATABASE_URL), echo=False, **POOL_SETTINGS)
 elif DATABASE_URL.startswith('sqlite'):
     # SQLite (Desenvolvimento local)
     BASE_DIR = Path(__file__).resolve().parent.parent.parent
     DATABASE_DIR = BASE_DIR / 'database'
     DATABASE_DIR.mkdir(exist_ok=True)
-    
+
     if not DATABASE_URL.startswith('sqlite:///./'):
         DATABASE_URL = f'sqlite:///{DATABASE_DIR}/database.db'
-    
+
+    # O SQLite usa o pool padrão do driver; as configurações DB_POOL_* valem para o PostgreSQL
     engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
+    async_engine = create_async_engine(get_async_database_url(DATABASE_URL))
 else:
     raise ValueError(f"Tipo de banco não suportado: {DATABASE_URL}")
 
-# SessionLocal para criar sessões do banco
+# SessionLocal para criar sessões do banco (scripts, migrações e inicialização)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# AsyncSessionLocal para as sessões usadas pelas rotas da API
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_pool_stats() -> dict:
+    """
+    Retorna o estado atual do pool de conexões usado pela API
+    """
+    pool = async_engine.pool
+    stats = {
+        'pool_class': type(pool).__name__,
+        'settings': POOL_SETTINGS,
+    }
+    # Pools sem fila (NullPool/StaticPool) não expõem contadores
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            stats[name] = counter()
+    return stats
+
+
 # Base para os modelos
 Base = declarative_base()
 
-# Dependency para obter a sessão do banco
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependency para obter a sessão assíncrona do banco
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,10 +1,17 @@
 import os
+from typing import NamedTuple, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..utils.password_hashing import password_hashing_pool
+from ..utils.token_cache import access_token_cache
+from ..utils.token_revocation import token_revocations
+from ..utils.token_service import TokenError, TokenService
+from ..utils.user_cache import current_user_cache
+from .database import get_db
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -15,30 +22,51 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'secret')
 # Algoritmo para JWT
 ALGORITHM = 'HS256'
 
+# Implementação usada para assinar/verificar os tokens (hmac, jose ou pyjwt)
+JWT_BACKEND = os.getenv('JWT_BACKEND', 'hmac')
+
+token_service = TokenService(SECRET_KEY, ALGORITHM, backend=JWT_BACKEND)
+
 # Tempo de expiração do token (30 minutos)
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Usar bcrypt diretamente em vez de passlib
 import bcrypt
 
+# Custo (work factor) do bcrypt: cada unidade a mais dobra o tempo de hash e de verificação.
+# Hashes com outro custo são refeitos no próximo login bem-sucedido
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="auth/login-form")
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hash da senha usando bcrypt diretamente com truncamento seguro
+    rounds: custo do bcrypt; por padrão BCRYPT_ROUNDS
     """
     # Truncar a senha para 72 bytes para compatibilidade com bcrypt
     password_bytes = password.encode('utf-8')[:72]
     
-    # Gerar salt e fazer hash
-    salt = bcrypt.gensalt()
+    # Gerar salt com o custo configurado e fazer hash
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     # Retornar como string
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str, rounds: Optional[int] = None) -> bool:
+    """
+    Verificar se o hash foi gerado com um custo diferente do configurado ($2b$<custo>$...)
+    """
+    try:
+        cost = int(hashed_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return True
+    return cost != (rounds or BCRYPT_ROUNDS)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verificar senha usando bcrypt diretamente com truncamento seguro
@@ -55,58 +83,125 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def verify_token(token: str = Depends(oauth2_schema)):
+async def hash_password_async(password: str) -> str:
     """
-    Função para verificar e decodificar o access token JWT
+    Hash da senha no pool dedicado ao bcrypt, sem bloquear o event loop (503 se o pool estiver saturado)
+    """
+    return await password_hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verificar senha no pool dedicado ao bcrypt, sem bloquear o event loop (503 se o pool estiver saturado)
+    """
+    return await password_hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+class TokenClaims(NamedTuple):
+    """
+    Claims do access token; permissões e versão de segurança são None em tokens
+    emitidos antes de elas existirem
+    """
+
+    user_id: int
+    username: Optional[str] = None
+    is_admin: Optional[bool] = None
+    is_active: Optional[bool] = None
+    security_version: Optional[int] = None
+
+
+def _credentials_exception(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={'WWW-Authenticate': 'Bearer'},
+    )
+
+
+def decode_token(token: str, accepted_types: tuple, wrong_type_detail: str, invalid_detail: str) -> Tuple[dict, int]:
+    """
+    Função única de verificação dos tokens JWT: valida assinatura/expiração pelo serviço de tokens,
+    o tipo do token e o sub, devolvendo o payload e o user_id
+    accepted_types: valores aceitos na claim type (None aceita tokens antigos sem tipo)
     """
     try:
         # Decodificar o token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-
-        # Verificar se é um access token (ou token antigo sem tipo)
-        token_type = payload.get('type')
-        if token_type is not None and token_type != 'access':
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token inválido - tipo incorreto. Use access token para autenticação.',
-                headers={'WWW-Authenticate': 'Bearer'},
-            )
-
-        user_id_str = payload.get('sub')
-
-        if user_id_str is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token inválido - sub não encontrado',
-                headers={'WWW-Authenticate': 'Bearer'},
-            )
-
-        # Converter para int se necessário
-        try:
-            user_id = int(user_id_str)
-        except (ValueError, TypeError):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token inválido - user_id inválido',
-                headers={'WWW-Authenticate': 'Bearer'},
-            )
+        payload = token_service.decode(token)
+    except TokenError:
+        raise _credentials_exception(invalid_detail)
 
-        return user_id
+    # Verificar o tipo do token
+    if payload.get('type') not in accepted_types:
+        raise _credentials_exception(wrong_type_detail)
 
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Access token inválido ou expirado',
-            headers={'WWW-Authenticate': 'Bearer'},
-        )
+    user_id_str = payload.get('sub')
+
+    if user_id_str is None:
+        raise _credentials_exception('Token inválido - sub não encontrado')
 
+    # Converter para int se necessário
+    try:
+        user_id = int(user_id_str)
+    except (ValueError, TypeError):
+        raise _credentials_exception('Token inválido - user_id inválido')
 
-def get_current_user(user_id: int = Depends(verify_token)):
+    return payload, user_id
+
+
+def decode_access_token(token: str) -> TokenClaims:
+    """
+    Função para verificar e decodificar o access token JWT com suas claims
+    Tokens já verificados vêm do cache (até o exp) sem refazer a verificação HMAC
+    """
+    claims = access_token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    # Access token ou token antigo sem tipo
+    payload, user_id = decode_token(
+        token,
+        ('access', None),
+        'Token inválido - tipo incorreto. Use access token para autenticação.',
+        'Access token inválido ou expirado',
+    )
+
+    claims = TokenClaims(
+        user_id=user_id,
+        username=payload.get('usr'),
+        is_admin=payload.get('adm'),
+        is_active=payload.get('act'),
+        security_version=payload.get('sv'),
+    )
+
+    # Tokens sem exp não expiram e por isso não entram no cache
+    expires_at = payload.get('exp')
+    if isinstance(expires_at, (int, float)):
+        access_token_cache.set(token, claims, expires_at)
+    return claims
+
+
+def verify_token(token: str = Depends(oauth2_schema)):
+    """
+    Função para verificar e decodificar o access token JWT
+    """
+    return decode_access_token(token).user_id
+
+
+async def get_token_claims(token: str = Depends(oauth2_schema)) -> TokenClaims:
+    """
+    Dependência com as claims do access token da requisição
+    Assíncrona para rodar no event loop: com o cache de tokens, é só uma consulta a um dicionário
+    e não compensa o desvio para o pool de threads das dependências síncronas
+    """
+    return decode_access_token(token)
+
+
+async def get_current_user(claims: TokenClaims = Depends(get_token_claims)):
     """
     Função para obter o usuário atual baseado no token
     Nota: Deve ser usada junto com Depends(get_db) no endpoint
     """
-    return user_id
+    return claims.user_id
 
 
 def get_current_user_optional():
@@ -115,7 +210,7 @@ def get_current_user_optional():
     """
     from fastapi import Request
 
-    def _get_optional_user(request: Request):
+    async def _get_optional_user(request: Request):
         try:
             # Tentar extrair o token do header Authorization
             auth_header = request.headers.get('Authorization')
@@ -124,26 +219,10 @@ def get_current_user_optional():
 
             token = auth_header.split(' ')[1]
 
-            # Decodificar o token
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            # Mesma verificação (e cache) do access token obrigatório
+            return decode_access_token(token).user_id
 
-            # Verificar se é um access token (ou token antigo sem tipo)
-            token_type = payload.get('type')
-            if token_type is not None and token_type != 'access':
-                return None
-
-            user_id_str = payload.get('sub')
-            if user_id_str is None:
-                return None
-
-            # Converter para int se necessário
-            try:
-                user_id = int(user_id_str)
-                return user_id
-            except (ValueError, TypeError):
-                return None
-
-        except (JWTError, Exception):
+        except Exception:
             return None
 
     return _get_optional_user
@@ -153,60 +232,116 @@ def verify_refresh_token(refresh_token: str):
     """
     Função para verificar e decodificar o refresh token JWT
     """
-    try:
-        # Decodificar o token
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-
-        # Verificar se é um refresh token
-        token_type = payload.get('type')
-        if token_type != 'refresh':
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token inválido - tipo incorreto. Use refresh token.',
-                headers={'WWW-Authenticate': 'Bearer'},
-            )
-
-        user_id_str = payload.get('sub')
-
-        if user_id_str is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token inválido - sub não encontrado',
-                headers={'WWW-Authenticate': 'Bearer'},
-            )
-
-        # Converter para int se necessário
-        try:
-            user_id = int(user_id_str)
-        except (ValueError, TypeError):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Token inválido - user_id inválido',
-                headers={'WWW-Authenticate': 'Bearer'},
-            )
+    _, user_id = decode_token(
+        refresh_token,
+        ('refresh',),
+        'Token inválido - tipo incorreto. Use refresh token.',
+        'Refresh token inválido ou expirado',
+    )
+    return user_id
 
-        return user_id
 
-    except JWTError:
+def ensure_admin(is_admin: Optional[bool]):
+    """
+    Função para validar a flag is_admin do usuário atual já lida pela rota
+    (None quando o usuário não existe)
+    """
+    if is_admin is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Usuário não encontrado')
+    if not is_admin:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Refresh token inválido ou expirado',
-            headers={'WWW-Authenticate': 'Bearer'},
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Acesso negado. Apenas administradores podem realizar esta ação.',
         )
 
 
-def verify_admin_access(current_user_id: int, db: Session):
+class CurrentUser(NamedTuple):
+    """Dados do usuário autenticado usados nas verificações de permissão"""
+
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+
+
+async def load_current_user(current_user_id: int, db: AsyncSession) -> Optional[CurrentUser]:
     """
-    Função para verificar se o usuário atual é administrador
+    Função para carregar o usuário autenticado, consultando o banco apenas
+    quando ele não está no cache (TTL curto, invalidado nas alterações do usuário)
     """
     from ..models.user import User
 
-    user = db.query(User).filter(User.id == current_user_id).first()
+    current_user = current_user_cache.get(current_user_id)
+    if current_user is not None:
+        return current_user
+    cache_version = current_user_cache.version
+
+    user = await db.get(User, current_user_id)
     if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Usuário não encontrado')
-    if not user.is_admin:
+        return None
+
+    current_user = CurrentUser(user.id, user.username, bool(user.is_active), bool(user.is_admin))
+    return current_user_cache.set(current_user_id, current_user, cache_version)
+
+
+async def resolve_current_user(claims: TokenClaims, db: AsyncSession) -> Optional[CurrentUser]:
+    """
+    Função para obter o usuário autenticado a partir das claims do token, sem consultar
+    o banco enquanto a versão de segurança do token não tiver sido revogada; tokens
+    antigos (sem claims) ou revogados usam os dados atuais do usuário
+    """
+    await token_revocations.refresh_if_due(db)
+
+    if (
+        claims.security_version is not None
+        and claims.is_admin is not None
+        and token_revocations.is_current(claims.user_id, claims.security_version)
+    ):
+        return CurrentUser(claims.user_id, claims.username, bool(claims.is_active), bool(claims.is_admin))
+
+    return await load_current_user(claims.user_id, db)
+
+
+async def get_current_user_obj(
+    claims: TokenClaims = Depends(get_token_claims), db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    """
+    Dependência que carrega o usuário autenticado uma única vez por requisição
+    """
+    current_user = await resolve_current_user(claims, db)
+    if current_user is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Acesso negado. Apenas administradores podem realizar esta ação.',
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Usuário não encontrado',
+            headers={'WWW-Authenticate': 'Bearer'},
         )
-    return user
+    return current_user
+
+
+async def get_current_admin(
+    claims: TokenClaims = Depends(get_token_claims), db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    """
+    Dependência que exige um administrador, confiando na claim do token enquanto ela não for revogada
+    """
+    current_user = await resolve_current_user(claims, db)
+    ensure_admin(current_user.is_admin if current_user else None)
+    return current_user
+
+
+def revoke_user_tokens(user):
+    """
+    Função para aplicar, após o commit, uma alteração de permissões/status do usuário:
+    tokens com versão de segurança anterior deixam de ser confiados e o cache é descartado
+    """
+    token_revocations.revoke(user.id, user.security_version)
+    current_user_cache.invalidate(user.id)
+
+
+async def verify_admin_access(current_user_id: int, db: AsyncSession) -> CurrentUser:
+    """
+    Função para verificar se o usuário atual é administrador
+    """
+    current_user = await load_current_user(current_user_id, db)
+    ensure_admin(current_user.is_admin if current_user else None)
+    return current_user
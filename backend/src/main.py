@@ -1,57 +1,17 @@
-import json
-from decimal import Decimal
-
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm.exc import StaleDataError
 from starlette.responses import JSONResponse
 from .config.database import engine
 from .models import Base
 from .routers.auth_routes import auth_router
 from .routers.item_routes import item_router
+from .routers.metrics_routes import metrics_router
 from .routers.order_routes import order_router
 from .routers.user_routes import user_router
 from .utils.init_db import init_database
 
-
-def decimal_default(obj):
-    """Conversor JSON customizado para Decimal"""
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError
-
-
-def safe_float_to_decimal(value):
-    """Converte float para decimal seguro com 2 casas decimais"""
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        # Arredondar para 2 casas decimais para evitar problemas de precisão
-        return round(float(value), 2)
-    return value
-
-
-def convert_model_floats(obj):
-    """Converte campos float de modelos para valores seguros"""
-    if hasattr(obj, '__dict__'):
-        # É um modelo SQLAlchemy
-        model_dict = {}
-        for key, value in obj.__dict__.items():
-            if not key.startswith('_'):
-                if isinstance(value, float):
-                    model_dict[key] = safe_float_to_decimal(value)
-                elif isinstance(value, list):
-                    model_dict[key] = [convert_model_floats(item) for item in value]
-                elif hasattr(value, '__dict__'):
-                    model_dict[key] = convert_model_floats(value)
-                else:
-                    model_dict[key] = value
-        return model_dict
-    elif isinstance(obj, list):
-        return [convert_model_floats(item) for item in obj]
-    else:
-        return obj
-
 # Criar as tabelas no banco de dados
 Base.metadata.create_all(bind=engine)
 
@@ -62,10 +22,6 @@ app = FastAPI(
     title='Pizzaria API', 
     description='API para sistema de pizzaria', 
     version='1.0.0',
-    # Configurar encoder customizado para Decimal
-    json_encoders={
-        Decimal: lambda v: float(v) if v is not None else None
-    }
 )
 
 # Configurar CORS
@@ -80,13 +36,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    """
+    Pedido alterado por outra requisição entre a leitura e a gravação (versão do pedido mudou)
+    """
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={'detail': 'O pedido foi alterado por outra requisição. Recarregue e tente novamente.'},
+    )
+
+
 # Incluir os roteadores
 app.include_router(auth_router)
 app.include_router(order_router)
 app.include_router(item_router)
 app.include_router(user_router)
+app.include_router(metrics_router)
 
 
 @app.get('/')
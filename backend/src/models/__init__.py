@@ -1,7 +1,8 @@
 from .base import Base
 from .item import CategoryType, Item, SizeType
 from .order import Order
+from .order_daily_stats import OrderDailyStats
 from .order_item import OrderItem
 from .user import User
 
-__all__ = ['Base', 'User', 'Order', 'Item', 'OrderItem', 'CategoryType', 'SizeType']
+__all__ = ['Base', 'User', 'Order', 'Item', 'OrderItem', 'OrderDailyStats', 'CategoryType', 'SizeType']
@@ -6,11 +6,17 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 
+def utc_now() -> datetime:
+    """
+    Data/hora atual em UTC sem fuso: as colunas são timestamp without time zone e o
+    asyncpg recusa datetimes com fuso nelas
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class BaseModel(Base):
     __abstract__ = True
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(
-        DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc)
-    )
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
@@ -1,9 +1,10 @@
 import enum
 from decimal import Decimal
 
-from sqlalchemy import Boolean, Column, Enum, Float, Integer, String, Text
+from sqlalchemy import Boolean, Column, Enum, Integer, String, Text
 from sqlalchemy.orm import relationship
 
+from ..utils.money import Money, MoneyValue, to_money
 from .base import BaseModel
 
 
@@ -36,9 +37,9 @@ class Item(BaseModel):
     description = Column('description', Text, nullable=True)
     category = Column('category', Enum(CategoryType), nullable=False)
 
-    # Preço e tamanhos
+    # Preço (em centavos no banco) e tamanhos
     size = Column('size', Enum(SizeType), nullable=False)
-    price = Column('price', Float, nullable=False)
+    price = Column('price', Money, nullable=False)
 
     # Status de disponibilidade
     is_available = Column('is_available', Boolean, nullable=False, default=True)
@@ -62,7 +63,7 @@ class Item(BaseModel):
         name: str,
         category: CategoryType,
         size: SizeType,
-        price: float,
+        price: MoneyValue,
         description: str = None,
         is_available: bool = True,
         calories: int = None,
@@ -75,7 +76,7 @@ class Item(BaseModel):
         self.description = description
         self.category = category
         self.size = size
-        self.price = float(price)
+        self.price = to_money(price)
         self.is_available = is_available
         self.calories = calories
         self.preparation_time = preparation_time
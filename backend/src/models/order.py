@@ -1,9 +1,10 @@
 from decimal import Decimal
 
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
-from sqlalchemy_utils import ChoiceType
+from sqlalchemy_utils import Choice, ChoiceType
 
+from ..utils.money import Money
 from .base import BaseModel
 
 
@@ -46,18 +47,42 @@ class Order(BaseModel):
     # Pagamento
     payment_method = Column(ChoiceType(PAYMENT_CHOICES), nullable=False)
 
-    # Valores
-    subtotal = Column(Float, nullable=False)
-    delivery_fee = Column(Float, default=0.0)
-    total_amount = Column(Float, nullable=False)
+    # Valores (em centavos no banco)
+    subtotal = Column(Money, nullable=False)
+    delivery_fee = Column(Money, default=0)
+    total_amount = Column(Money, nullable=False)
 
     # Observações e tempo
     observations = Column(Text, nullable=True)
     estimated_delivery_time = Column(Integer, nullable=True)  # em minutos
 
+    # Versão para controle de concorrência otimista: alterações pelo ORM só gravam se a versão
+    # lida ainda for a atual; os incrementos atômicos dos itens do pedido também a incrementam
+    version = Column('version', Integer, nullable=False, default=1, server_default='1')
+
     # Relacionamentos
     user = relationship('User', back_populates='orders')
     order_items = relationship('OrderItem', back_populates='order', cascade='all, delete-orphan')
 
+    # Índices das listagens (mais recentes primeiro) e das estatísticas por período
+    __table_args__ = (
+        Index('ix_orders_user_id_created_at', 'user_id', 'created_at', 'id'),
+        Index('ix_orders_user_id_status_created_at', 'user_id', 'status', 'created_at', 'id'),
+        Index('ix_orders_status_created_at', 'status', 'created_at', 'id'),
+        Index('ix_orders_created_at', 'created_at', 'id'),
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+
+    @classmethod
+    def status_choice(cls, code: str) -> Choice:
+        """Retorna o Choice de status igual ao carregado do banco (código + rótulo)"""
+        return Choice(code, dict(cls.STATUS_CHOICES)[code])
+
+    @classmethod
+    def payment_choice(cls, code: str) -> Choice:
+        """Retorna o Choice de pagamento igual ao carregado do banco (código + rótulo)"""
+        return Choice(code, dict(cls.PAYMENT_CHOICES)[code])
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, Integer, String, UniqueConstraint
+
+from ..utils.money import Money
+from .base import BaseModel
+
+
+class OrderDailyStats(BaseModel):
+    __tablename__ = 'order_daily_stats'
+
+    # Consolidado por dia de criação do pedido (UTC) e status, mantido pelas rotas de
+    # pedidos na mesma transação que altera o pedido (ver utils/order_stats.py)
+    day = Column('day', Date, nullable=False)
+    status = Column('status', String(50), nullable=False)
+
+    # Quantidade de pedidos do dia que estão neste status e a soma dos seus totais
+    orders_count = Column('orders_count', Integer, nullable=False, default=0)
+    revenue = Column('revenue', Money, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint('day', 'status', name='uq_order_daily_stats_day_status'),)
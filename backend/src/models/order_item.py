@@ -1,8 +1,9 @@
 from decimal import Decimal
 
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
+from ..utils.money import Money, MoneyValue, to_money
 from .base import BaseModel
 
 
@@ -17,10 +18,10 @@ class OrderItem(BaseModel):
     quantity = Column('quantity', Integer, nullable=False, default=1)
 
     # Preço unitário no momento do pedido (para histórico)
-    unit_price = Column('unit_price', Float, nullable=False)
+    unit_price = Column('unit_price', Money, nullable=False)
 
     # Preço total (quantidade * preço unitário)
-    total_price = Column('total_price', Float, nullable=False)
+    total_price = Column('total_price', Money, nullable=False)
 
     # Observações específicas do item (ex: sem cebola, massa fina, etc.)
     notes = Column('notes', Text, nullable=True)
@@ -29,20 +30,26 @@ class OrderItem(BaseModel):
     order = relationship('Order', back_populates='order_items')
     item = relationship('Item', back_populates='order_items')
 
+    # Linhas de um pedido (e de um item dentro do pedido) e uso de um item em pedidos
+    __table_args__ = (
+        Index('ix_order_items_order_id_item_id', 'order_id', 'item_id'),
+        Index('ix_order_items_item_id', 'item_id'),
+    )
+
     def __init__(
         self,
         order_id: int,
         item_id: int,
         quantity: int,
-        unit_price: float,
-        total_price: float = None,
+        unit_price: MoneyValue,
+        total_price: MoneyValue = None,
         notes: str = None,
     ):
         self.order_id = order_id
         self.item_id = item_id
         self.quantity = quantity
-        self.unit_price = float(unit_price)
-        self.total_price = float(total_price) if total_price is not None else float(unit_price) * quantity
+        self.unit_price = to_money(unit_price)
+        self.total_price = to_money(total_price) if total_price is not None else self.unit_price * quantity
         self.notes = notes
 
     def __str__(self):
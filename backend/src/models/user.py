@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from .base import BaseModel
@@ -13,9 +13,15 @@ class User(BaseModel):
     is_active = Column('is_active', Boolean, default=True)
     is_admin = Column('is_admin', Boolean, default=False)
 
+    # Incrementada quando permissões/status mudam; invalida os access tokens emitidos antes
+    security_version = Column('security_version', Integer, nullable=False, default=1, server_default='1')
+
     # Relacionamentos
     orders = relationship('Order', back_populates='user')
 
+    # Listagem paginada por cursor (mais recentes primeiro)
+    __table_args__ = (Index('ix_users_created_at', 'created_at', 'id'),)
+
     def __init__(self, username: str, email: str, hashed_password: str, is_active: bool = True, is_admin: bool = False):
         self.username = username
         self.email = email
@@ -1,11 +1,20 @@
+import logging
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..config.database import get_db
-from ..config.security import ALGORITHM, SECRET_KEY, get_current_user_optional, hash_password, oauth2_schema, verify_password
+from ..config.security import (
+    get_current_user_optional,
+    hash_password_async,
+    oauth2_schema,
+    password_needs_rehash,
+    token_service,
+    verify_password_async,
+)
 from ..models import User
 from ..schemas import (
     MessageResponse,
@@ -16,6 +25,10 @@ from ..schemas import (
     UserLogin,
     UserResponse,
 )
+from ..utils.password_hashing import password_hashing_pool
+from ..utils.user_cache import user_stats_cache
+
+logger = logging.getLogger(__name__)
 
 auth_router = APIRouter(prefix='/auth', tags=['auth'])
 
@@ -29,24 +42,24 @@ async def home():
 
 
 @auth_router.post('/register', response_model=UserResponse)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Rota para registro público de usuário (sempre cria usuário comum)
     """
     # Verificar se usuário já existe por email
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
 
     if existing_user:
         raise HTTPException(status_code=400, detail='E-mail já existe')
 
     # Verificar se username já existe
-    existing_username = db.query(User).filter(User.username == user_data.username).first()
+    existing_username = await db.scalar(select(User).where(User.username == user_data.username))
 
     if existing_username:
         raise HTTPException(status_code=400, detail='Nome de usuário já existe')
 
     # Criar novo usuário (sempre como usuário comum)
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
 
     new_user = User(
         username=user_data.username,
@@ -57,8 +70,9 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    user_stats_cache.invalidate()
 
     return new_user
 
@@ -67,7 +81,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 async def create_admin_user(
     user_data: UserCreate, 
     current_user_id: int | None = Depends(get_current_user_optional()),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Rota para criar um novo usuário administrador (apenas admins podem usar)
@@ -82,7 +96,7 @@ async def create_admin_user(
     # Verificar se o usuário atual é admin
     from ..config.security import verify_admin_access
     try:
-        verify_admin_access(current_user_id, db)
+        await verify_admin_access(current_user_id, db)
     except HTTPException:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -90,19 +104,19 @@ async def create_admin_user(
         )
 
     # Verificar se usuário já existe por email
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
 
     if existing_user:
         raise HTTPException(status_code=400, detail='E-mail já existe')
 
     # Verificar se username já existe
-    existing_username = db.query(User).filter(User.username == user_data.username).first()
+    existing_username = await db.scalar(select(User).where(User.username == user_data.username))
 
     if existing_username:
         raise HTTPException(status_code=400, detail='Nome de usuário já existe')
 
     # Criar novo usuário admin
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
 
     new_admin = User(
         username=user_data.username,
@@ -113,23 +127,59 @@ async def create_admin_user(
     )
 
     db.add(new_admin)
-    db.commit()
-    db.refresh(new_admin)
+    await db.commit()
+    await db.refresh(new_admin)
+    user_stats_cache.invalidate()
 
     return new_admin
 
 
-def criar_access_token(user_id: int) -> str:
+def criar_access_token(user: User) -> str:
     """
     Função para criar um access token JWT para o usuário autenticado
-    user_id: ID do usuário
+    user: usuário autenticado; permissões, status e versão de segurança vão nas claims
+    para que as verificações de acesso não precisem consultar o banco
     Válido por 30 minutos
     """
     expiration = datetime.utcnow() + timedelta(minutes=30)
-    token = jwt.encode({'sub': str(user_id), 'exp': expiration, 'type': 'access'}, SECRET_KEY, algorithm=ALGORITHM)
+    payload = {
+        'sub': str(user.id),
+        'exp': expiration,
+        'type': 'access',
+        'usr': user.username,
+        'adm': bool(user.is_admin),
+        'act': bool(user.is_active),
+        'sv': user.security_version,
+    }
+    token = token_service.encode(payload)
     return token
 
 
+async def atualizar_hash_senha(user: User, password: str, db: AsyncSession):
+    """
+    Função para refazer, após um login bem-sucedido, o hash gerado com custo diferente do configurado
+    (BCRYPT_ROUNDS), migrando as senhas existentes sem depender de uma migração
+
+    É só uma otimização: com chamadas aguardando no pool do bcrypt, se ele recusar por estar
+    cheio ou se a gravação falhar, o hash fica para um próximo login e o login segue normalmente
+    """
+    if not password_needs_rehash(user.hashed_password) or password_hashing_pool.queued > 0:
+        return
+
+    try:
+        user.hashed_password = await hash_password_async(password)
+    except HTTPException:
+        return
+
+    try:
+        await db.commit()
+    except SQLAlchemyError as e:
+        # O rollback expira o usuário; recarregar para gerar os tokens com o hash antigo
+        await db.rollback()
+        await db.refresh(user)
+        logger.warning('Falha ao gravar o novo hash de senha do usuário %s: %s', user.id, e)
+
+
 def criar_refresh_token(user_id: int) -> str:
     """
     Função para criar um refresh token JWT para o usuário autenticado
@@ -137,55 +187,25 @@ def criar_refresh_token(user_id: int) -> str:
     Válido por 7 dias
     """
     expiration = datetime.utcnow() + timedelta(days=7)
-    token = jwt.encode({'sub': str(user_id), 'exp': expiration, 'type': 'refresh'}, SECRET_KEY, algorithm=ALGORITHM)
+    token = token_service.encode({'sub': str(user_id), 'exp': expiration, 'type': 'refresh'})
     return token
 
 
-def verificar_refresh_token(refresh_token: str) -> int:
-    """
-    Função para verificar e decodificar o refresh token JWT
-    Retorna o user_id se o token for válido
-    """
-    try:
-        # Decodificar o token
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-
-        # Verificar se é um refresh token
-        token_type = payload.get('type')
-        if token_type != 'refresh':
-            raise HTTPException(status_code=401, detail='Token inválido - tipo incorreto')
-
-        # Obter user_id
-        user_id_str = payload.get('sub')
-        if user_id_str is None:
-            raise HTTPException(status_code=401, detail='Token inválido - sub não encontrado')
-
-        try:
-            user_id = int(user_id_str)
-        except (ValueError, TypeError):
-            raise HTTPException(status_code=401, detail='Token inválido - user_id inválido')
-
-        return user_id
-
-    except JWTError:
-        raise HTTPException(status_code=401, detail='Refresh token inválido ou expirado')
-
-
 @auth_router.post('/login', response_model=Token)
-async def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login_user(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Rota para autenticação de usuário
     """
 
     # Buscar usuário por email ou username
-    user = (
-        db.query(User)
-        .filter((User.email == login_data.email_or_username) | (User.username == login_data.email_or_username))
-        .first()
+    user = await db.scalar(
+        select(User).where(
+            (User.email == login_data.email_or_username) | (User.username == login_data.email_or_username)
+        )
     )
 
     # Verificar se usuário existe e senha está correta
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await verify_password_async(login_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail='Email/usuário ou senha incorretos')
 
     # Verificar se usuário está ativo
@@ -193,7 +213,8 @@ async def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=401, detail='Usuário desativado')
 
     else:
-        access_token = criar_access_token(user.id)
+        await atualizar_hash_senha(user, login_data.password, db)
+        access_token = criar_access_token(user)
         refresh_token = criar_refresh_token(user.id)
 
     return {
@@ -207,28 +228,28 @@ async def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
 
 
 @auth_router.post('/login-form', response_model=Token)
-async def login_user_form(dados_formulario: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_user_form(dados_formulario: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
     Rota para autenticação de usuário
     """
 
     # Buscar usuário por email ou username
-    user = (
-        db.query(User)
-        .filter((User.email == dados_formulario.username) | (User.username == dados_formulario.username))
-        .first()
+    user = await db.scalar(
+        select(User).where((User.email == dados_formulario.username) | (User.username == dados_formulario.username))
     )
 
     # Verificar se usuário existe e senha está correta
-    if not user or not verify_password(dados_formulario.password, user.hashed_password):
+    if not user or not await verify_password_async(dados_formulario.password, user.hashed_password):
         raise HTTPException(status_code=401, detail='Email/usuário ou senha incorretos')
 
     # Verificar se usuário está ativo
     if not user.is_active:
         raise HTTPException(status_code=401, detail='Usuário desativado')
 
+    await atualizar_hash_senha(user, dados_formulario.password, db)
+
     # Gerar tokens
-    access_token = criar_access_token(user.id)
+    access_token = criar_access_token(user)
     refresh_token = criar_refresh_token(user.id)
 
     return {
@@ -244,7 +265,7 @@ async def login_user_form(dados_formulario: OAuth2PasswordRequestForm = Depends(
 @auth_router.post('/refresh', response_model=RefreshTokenResponse)
 async def refresh_token(
     refresh_data: RefreshTokenRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int | None = Depends(get_current_user_optional()),
 ):
     """
@@ -264,7 +285,7 @@ async def refresh_token(
             user_id = verify_refresh_token(refresh_data.refresh_token)
 
         # Buscar o usuário no banco de dados
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
 
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Usuário não encontrado')
@@ -274,7 +295,7 @@ async def refresh_token(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Usuário desativado')
 
         # Gerar novos tokens
-        new_access_token = criar_access_token(user.id)
+        new_access_token = criar_access_token(user)
         new_refresh_token = criar_refresh_token(user.id)
 
         return {
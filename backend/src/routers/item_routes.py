@@ -1,16 +1,40 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..config.database import get_db
-from ..config.security import get_current_user, verify_admin_access
+from ..config.security import CurrentUser, get_current_admin
 from ..models.item import CategoryType, Item, SizeType
-from ..models.user import User
 from ..schemas.item_schemas import ItemCreate, ItemResponse, ItemUpdate
+from ..utils.menu_cache import MenuPayload, etag_matches, menu_cache, serialize_menu
 
 item_router = APIRouter(prefix='/items', tags=['items'])
 
 
+def menu_response(request: Request, payload: MenuPayload) -> Response:
+    """
+    Responder 304 se o cliente já tem esta versão do cardápio (If-None-Match),
+    senão devolver os bytes pré-serializados (gzip se o cliente aceitar) com a ETag
+    """
+    etag = payload.etag
+    headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+
+    use_gzip = payload.gzip_body is not None and 'gzip' in request.headers.get('accept-encoding', '')
+    if use_gzip:
+        # Representação diferente precisa de ETag forte diferente
+        etag = f'{etag[:-1]}-gzip"'
+        headers['Content-Encoding'] = 'gzip'
+    headers['ETag'] = etag
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        headers.pop('Content-Encoding', None)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = payload.gzip_body if use_gzip else payload.body
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
 @item_router.get('/')
 async def home():
     """
@@ -21,21 +45,14 @@ async def home():
 
 @item_router.post('/create-item', response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item(
-    item_data: ItemCreate, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)
+    item_data: ItemCreate, current_user: CurrentUser = Depends(get_current_admin), db: AsyncSession = Depends(get_db)
 ):
     """
     Rota para criação de um novo item do cardápio (apenas administradores)
     """
-    # Verificar se o usuário é admin
-    verify_admin_access(current_user_id, db)
     try:
-        # Verificar se o usuário existe e está ativo
-        current_user = db.query(User).filter(User.id == current_user_id).first()
-        if not current_user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Usuário não encontrado')
-
         # Verificar se item com mesmo nome já existe
-        existing_item = db.query(Item).filter(Item.name == item_data.name).first()
+        existing_item = await db.scalar(select(Item).where(Item.name == item_data.name))
         if existing_item:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail=f"Item com nome '{item_data.name}' já existe"
@@ -57,15 +74,16 @@ async def create_item(
         )
 
         db.add(new_item)
-        db.commit()
-        db.refresh(new_item)
+        await db.commit()
+        await db.refresh(new_item)
+        menu_cache.invalidate()
 
         return new_item
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro interno do servidor: {str(e)}'
         )
@@ -73,70 +91,84 @@ async def create_item(
 
 @item_router.get('/list-items', response_model=List[ItemResponse])
 async def list_items(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     category: Optional[CategoryType] = None,
     available_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Listar itens do cardápio com filtros opcionais
     """
     try:
-        query = db.query(Item)
+        cache_key = ('list-items', category, available_only, skip, limit)
+        payload = menu_cache.get(cache_key)
+        if payload is None:
+            cache_version = menu_cache.version
 
-        # Filtrar por categoria se especificado
-        if category:
-            query = query.filter(Item.category == category)
+            query = select(Item)
 
-        # Filtrar apenas itens disponíveis se solicitado
-        if available_only:
-            query = query.filter(Item.is_available == True)
+            # Filtrar por categoria se especificado
+            if category:
+                query = query.where(Item.category == category)
 
-        # Ordenar por categoria e nome
-        query = query.order_by(Item.category, Item.name)
+            # Filtrar apenas itens disponíveis se solicitado
+            if available_only:
+                query = query.where(Item.is_available == True)
 
-        # Aplicar paginação
-        items = query.offset(skip).limit(limit).all()
+            # Ordenar por categoria e nome
+            query = query.order_by(Item.category, Item.name)
 
-        return items
+            # Aplicar paginação
+            items = (await db.scalars(query.offset(skip).limit(limit))).all()
+
+            payload = menu_cache.set(cache_key, serialize_menu(items), cache_version)
+
+        return menu_response(request, payload)
 
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro ao listar itens: {str(e)}')
 
 
 @item_router.get('/get-item/{item_id}', response_model=ItemResponse)
-async def get_item(item_id: int, db: Session = Depends(get_db)):
+async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """
     Obter detalhes de um item específico pelo ID
     """
-    item = db.query(Item).filter(Item.id == item_id).first()
+    cache_key = ('item', item_id)
+    cached_item = menu_cache.get(cache_key)
+    if cached_item is not None:
+        return cached_item
+    cache_version = menu_cache.version
+
+    item = await db.get(Item, item_id)
 
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Item com ID {item_id} não encontrado')
 
-    return item
+    return menu_cache.set(cache_key, ItemResponse.model_validate(item), cache_version)
 
 
 @item_router.put('/edit-item/{item_id}', response_model=ItemResponse)
 async def edit_item(
-    item_id: int, item_data: ItemUpdate, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)
+    item_id: int,
+    item_data: ItemUpdate,
+    current_user: CurrentUser = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Editar um item do cardápio (apenas administradores)
     """
     try:
-        # Verificar se o usuário é admin
-        verify_admin_access(current_user_id, db)
-
         # Buscar o item
-        item = db.query(Item).filter(Item.id == item_id).first()
+        item = await db.get(Item, item_id)
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Item com ID {item_id} não encontrado')
 
         # Verificar se novo nome já existe (se foi alterado)
         if item_data.name and item_data.name != item.name:
-            existing_item = db.query(Item).filter(Item.name == item_data.name).first()
+            existing_item = await db.scalar(select(Item).where(Item.name == item_data.name))
             if existing_item:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST, detail=f"Item com nome '{item_data.name}' já existe"
@@ -147,78 +179,78 @@ async def edit_item(
         for field, value in update_data.items():
             setattr(item, field, value)
 
-        db.commit()
-        db.refresh(item)
+        await db.commit()
+        await db.refresh(item)
+        menu_cache.invalidate()
 
         return item
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro ao editar item: {str(e)}')
 
 
 @item_router.delete('/delete-item/{item_id}')
-async def delete_item(item_id: int, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)):
+async def delete_item(
+    item_id: int, current_user: CurrentUser = Depends(get_current_admin), db: AsyncSession = Depends(get_db)
+):
     """
     Deletar um item do cardápio (apenas administradores)
     """
     try:
-        # Verificar se o usuário é admin
-        verify_admin_access(current_user_id, db)
-
         # Buscar o item
-        item = db.query(Item).filter(Item.id == item_id).first()
+        item = await db.get(Item, item_id)
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Item com ID {item_id} não encontrado')
 
         # Verificar se item está sendo usado em pedidos
         from ..models.order_item import OrderItem
 
-        item_in_orders = db.query(OrderItem).filter(OrderItem.item_id == item_id).first()
+        item_in_orders = await db.scalar(select(OrderItem).where(OrderItem.item_id == item_id))
 
         if item_in_orders:
             # Ao invés de deletar, desativar o item
             item.is_available = False
-            db.commit()
+            await db.commit()
+            menu_cache.invalidate()
             return {
                 'message': f"Item '{item.name}' foi desativado pois está sendo usado em pedidos",
                 'action': 'deactivated',
             }
         else:
             # Deletar permanentemente se não estiver em uso
-            db.delete(item)
-            db.commit()
+            await db.delete(item)
+            await db.commit()
+            menu_cache.invalidate()
             return {'message': f"Item '{item.name}' deletado com sucesso", 'action': 'deleted'}
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro ao deletar item: {str(e)}')
 
 
 @item_router.put('/toggle-availability/{item_id}', response_model=ItemResponse)
 async def toggle_item_availability(
-    item_id: int, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)
+    item_id: int, current_user: CurrentUser = Depends(get_current_admin), db: AsyncSession = Depends(get_db)
 ):
     """
     Alternar disponibilidade de um item (apenas administradores)
     """
     try:
-        # Verificar se o usuário é admin
-        verify_admin_access(current_user_id, db)
-
         # Buscar o item
-        item = db.query(Item).filter(Item.id == item_id).first()
+        item = await db.get(Item, item_id)
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Item com ID {item_id} não encontrado')
 
         # Alternar disponibilidade
         item.is_available = not item.is_available
-        db.commit()
-        db.refresh(item)
+        await db.commit()
+        await db.refresh(item)
+        menu_cache.invalidate()
 
         status_text = 'ativado' if item.is_available else 'desativado'
         return item
@@ -226,7 +258,7 @@ async def toggle_item_availability(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro ao alterar disponibilidade: {str(e)}'
         )
@@ -237,25 +269,33 @@ async def toggle_item_availability(
 
 @item_router.get('/menu', response_model=List[ItemResponse])
 async def get_public_menu(
+    request: Request,
     category: CategoryType = None,
     available_only: bool = True,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Obter cardápio público (sem autenticação)
     """
-    query = db.query(Item)
+    cache_key = ('menu', category, available_only, skip, limit)
+    payload = menu_cache.get(cache_key)
+    if payload is None:
+        cache_version = menu_cache.version
 
-    if category:
-        query = query.filter(Item.category == category)
+        query = select(Item)
 
-    if available_only:
-        query = query.filter(Item.is_available == True)
+        if category:
+            query = query.where(Item.category == category)
 
-    items = query.offset(skip).limit(limit).all()
-    return items
+        if available_only:
+            query = query.where(Item.is_available == True)
+
+        items = (await db.scalars(query.offset(skip).limit(limit))).all()
+        payload = menu_cache.set(cache_key, serialize_menu(items), cache_version)
+
+    return menu_response(request, payload)
 
 
 @item_router.get('/categories')
@@ -273,31 +313,37 @@ async def search_items(
     available_only: bool = True,
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Buscar itens por nome ou descrição
     """
-    query = db.query(Item).filter(Item.name.ilike(f'%{q}%') | Item.description.ilike(f'%{q}%'))
+    query = select(Item).where(Item.name.ilike(f'%{q}%') | Item.description.ilike(f'%{q}%'))
 
     if category:
-        query = query.filter(Item.category == category)
+        query = query.where(Item.category == category)
 
     if available_only:
-        query = query.filter(Item.is_available == True)
+        query = query.where(Item.is_available == True)
 
-    items = query.offset(skip).limit(limit).all()
+    items = (await db.scalars(query.offset(skip).limit(limit))).all()
     return items
 
 
 @item_router.get('/{item_id}/public', response_model=ItemResponse)
-async def get_item_public(item_id: int, db: Session = Depends(get_db)):
+async def get_item_public(item_id: int, db: AsyncSession = Depends(get_db)):
     """
     Obter detalhes de um item específico (público)
     """
-    item = db.query(Item).filter(Item.id == item_id, Item.is_available == True).first()
+    cache_key = ('public-item', item_id)
+    cached_item = menu_cache.get(cache_key)
+    if cached_item is not None:
+        return cached_item
+    cache_version = menu_cache.version
+
+    item = await db.scalar(select(Item).where(Item.id == item_id, Item.is_available == True))
 
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Item não encontrado ou não disponível')
 
-    return item
+    return menu_cache.set(cache_key, ItemResponse.model_validate(item), cache_version)
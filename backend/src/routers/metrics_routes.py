@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from ..config.database import get_pool_stats
+from ..config.security import CurrentUser, get_current_admin
+from ..utils.password_hashing import password_hashing_pool
+
+metrics_router = APIRouter(prefix='/metrics', tags=['metrics'])
+
+
+@metrics_router.get('/db-pool')
+async def get_db_pool_metrics(current_user: CurrentUser = Depends(get_current_admin)):
+    """
+    Estado do pool de conexões do banco (apenas administradores)
+    """
+    return get_pool_stats()
+
+
+@metrics_router.get('/password-hashing')
+async def get_password_hashing_metrics(current_user: CurrentUser = Depends(get_current_admin)):
+    """
+    Ocupação e fila do pool de hash de senhas (apenas administradores)
+    """
+    return password_hashing_pool.stats()
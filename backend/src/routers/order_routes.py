@@ -1,27 +1,117 @@
 import json
-from decimal import Decimal
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import case, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.exc import StaleDataError
 from ..config.database import get_db
-from ..config.security import get_current_user, verify_admin_access
+from ..config.security import CurrentUser, get_current_admin, get_current_user, get_current_user_obj
 from ..models.item import Item
 from ..models.order import Order
+from ..models.order_daily_stats import OrderDailyStats
 from ..models.order_item import OrderItem
-from ..models.user import User
-from ..schemas.order_schemas import OrderCreate, OrderResponse, OrderSummary, OrderItemAdd, OrderItemRemove
+from ..schemas.order_schemas import (
+    OrderCreate,
+    OrderItemAdd,
+    OrderItemOperationType,
+    OrderItemRemove,
+    OrderItemsBatch,
+    OrderResponse,
+    OrderSummary,
+)
+from ..utils.order_calculations import (
+    DEFAULT_PREPARATION_TIME,
+    DELIVERY_FEE,
+    apply_line_removed,
+    estimate_delivery_time,
+    increment_order_totals,
+    item_preparation_time,
+    recalculate_order_totals,
+    validate_order_modification,
+)
+from ..utils.money import ZERO
+from ..utils.order_stats import apply_order_stats, record_order_changed, record_order_created
+from ..utils.pagination import keyset_page, set_next_cursor
 
 order_router = APIRouter(prefix='/orders', tags=['orders'])
 
 
-def safe_float(value, decimal_places=2):
-    """Converte Decimal/float para float garantindo casas decimais corretas"""
-    if isinstance(value, Decimal):
-        return float(round(value, decimal_places))
-    elif isinstance(value, (int, float)):
-        return float(round(Decimal(str(value)), decimal_places))
-    return float(value)
+async def bulk_insert_order_items(db: AsyncSession, order_id: int, order_items_data: List[dict]) -> dict:
+    """
+    Insere todas as linhas de um pedido em um único INSERT em lote (executemany + RETURNING),
+    sem passar pelo unit of work objeto a objeto.
+    Retorna o mapeamento item_id -> id da linha criada (item_id é único dentro de um pedido novo)
+    """
+    rows = [{'order_id': order_id, **item_data} for item_data in order_items_data]
+    result = await db.execute(insert(OrderItem.__table__).returning(OrderItem.id, OrderItem.item_id), rows)
+    return {item_id: order_item_id for order_item_id, item_id in result.all()}
+
+
+async def increment_order_item(
+    db: AsyncSession, order_id: int, item_id: int, quantity: int, observations: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Soma `quantity` à linha do item no pedido com um único UPDATE ... RETURNING atômico, sem ler a
+    linha antes: adições simultâneas do mesmo item não perdem quantidade. O total da linha é
+    recalculado pelo preço unitário gravado nela e as observações são acrescentadas às existentes.
+    Retorna os valores atualizados da linha, ou None se o item ainda não está no pedido
+    """
+    table = OrderItem.__table__
+    values = {
+        'quantity': table.c.quantity + quantity,
+        'total_price': table.c.unit_price * (table.c.quantity + quantity),
+    }
+    if observations:
+        values['notes'] = case(
+            (or_(table.c.notes.is_(None), table.c.notes == ''), observations),
+            else_=table.c.notes + ' | ' + observations,
+        )
+
+    # A linha mais antiga do item no pedido (o índice order_id + item_id atende a subconsulta)
+    first_line = (
+        select(func.min(table.c.id)).where(table.c.order_id == order_id, table.c.item_id == item_id).scalar_subquery()
+    )
+    statement = (
+        update(table)
+        .where(table.c.id == first_line)
+        .values(values)
+        .returning(
+            table.c.id, table.c.item_id, table.c.quantity, table.c.unit_price, table.c.total_price, table.c.notes
+        )
+    )
+    row = (await db.execute(statement)).one_or_none()
+    return dict(row._mapping) if row else None
+
+
+async def build_order_summaries(db: AsyncSession, orders: List[Order]) -> List[OrderSummary]:
+    """
+    Monta os resumos de uma página de pedidos, contando as linhas de todos eles
+    em uma única consulta agregada (COUNT agrupado por pedido)
+    """
+    items_counts = {}
+    if orders:
+        result = await db.execute(
+            select(OrderItem.order_id, func.count(OrderItem.id))
+            .where(OrderItem.order_id.in_([order.id for order in orders]))
+            .group_by(OrderItem.order_id)
+        )
+        items_counts = dict(result.all())
+
+    return [
+        OrderSummary(
+            id=order.id,
+            order_number=order.order_number,
+            customer_name=order.customer_name,
+            status=order.status,
+            total_amount=order.total_amount,
+            created_at=order.created_at,
+            items_count=items_counts.get(order.id, 0),
+        )
+        for order in orders
+    ]
 
 
 @order_router.get('/')
@@ -44,7 +134,9 @@ async def debug_order(request_data: dict, current_user_id: int = Depends(get_cur
 
 @order_router.post('/create-order', status_code=status.HTTP_201_CREATED)
 async def create_order(
-    order_data: OrderCreate, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)
+    order_data: OrderCreate,
+    current_user: CurrentUser = Depends(get_current_user_obj),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Rota para criação de um novo pedido (usuário deve estar autenticado)
@@ -52,14 +144,10 @@ async def create_order(
     try:
         # Debug: Imprimir dados recebidos
         print(f"DEBUG - Order data received: {order_data}")
-        print(f"DEBUG - User ID: {current_user_id}")
-        # Buscar dados do usuário autenticado
-        current_user = db.query(User).filter(User.id == current_user_id).first()
-        if not current_user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Usuário não encontrado')
+        print(f"DEBUG - User ID: {current_user.id}")
         # Validar se todos os itens existem e estão disponíveis
         item_ids = [item.item_id for item in order_data.items]
-        items_db = db.query(Item).filter(Item.id.in_(item_ids)).all()
+        items_db = (await db.scalars(select(Item).where(Item.id.in_(item_ids)))).all()
 
         if len(items_db) != len(item_ids):
             raise HTTPException(
@@ -78,29 +166,31 @@ async def create_order(
         items_map = {item.id: item for item in items_db}
 
         # Calcular valores
-        subtotal = Decimal('0.00')
+        subtotal = ZERO
         order_items_data = []
 
         for order_item in order_data.items:
             item = items_map[order_item.item_id]
-            unit_price = Decimal(str(item.price))
-            item_subtotal = unit_price * Decimal(str(order_item.quantity))
+            item_subtotal = item.price * order_item.quantity
             subtotal += item_subtotal
 
             order_items_data.append(
                 {
                     'item_id': order_item.item_id,
                     'quantity': order_item.quantity,
-                    'unit_price': float(unit_price),
-                    'total_price': float(item_subtotal),
+                    'unit_price': item.price,
+                    'total_price': item_subtotal,
                     'notes': order_item.observations,
                 }
             )
 
         # Calcular taxa de entrega
-        delivery_fee = Decimal('5.00') if order_data.is_delivery else Decimal('0.00')
+        delivery_fee = DELIVERY_FEE if order_data.is_delivery else ZERO
         total_amount = subtotal + delivery_fee
 
+        # Calcular tempo estimado de preparo
+        max_prep_time = max(item_preparation_time(items_map[item.item_id]) for item in order_data.items)
+
         # Gerar número do pedido
         import uuid
 
@@ -114,47 +204,38 @@ async def create_order(
             customer_phone=order_data.customer_phone,
             is_delivery=order_data.is_delivery,
             delivery_address=json.dumps(order_data.delivery_address.dict()) if order_data.delivery_address else None,
-            payment_method=order_data.payment_method.value if order_data.payment_method else None,
+            payment_method=Order.payment_choice(order_data.payment_method.value) if order_data.payment_method else None,
             observations=order_data.observations,
-            subtotal=float(subtotal),
-            delivery_fee=float(delivery_fee),
-            total_amount=float(total_amount),
-            status='pendente',
+            subtotal=subtotal,
+            delivery_fee=delivery_fee,
+            total_amount=total_amount,
+            estimated_delivery_time=estimate_delivery_time(max_prep_time, order_data.is_delivery),
+            status=Order.status_choice('pendente'),
         )
 
         db.add(new_order)
-        db.flush()  # Para obter o ID do pedido
-
-        # Criar os itens do pedido
-        order_items = []
-        for item_data in order_items_data:
-            order_item = OrderItem(order_id=new_order.id, **item_data)
-            order_items.append(order_item)
-            db.add(order_item)
+        await db.flush()  # Para obter o ID do pedido
 
-        # Calcular tempo estimado de preparo
-        max_prep_time = max([items_map[item.item_id].preparation_time or 20 for item in order_data.items])
-        delivery_time = 30 if order_data.is_delivery else 0
-        new_order.estimated_delivery_time = max_prep_time + delivery_time
+        # Criar os itens do pedido em lote
+        order_item_ids = await bulk_insert_order_items(db, new_order.id, order_items_data)
+        await record_order_created(db, new_order)
 
-        db.commit()
-        db.refresh(new_order)
+        await db.commit()
 
-        # Construir resposta manualmente para compatibilidade com o schema
+        # Construir resposta a partir do estado em memória: os ids vieram do INSERT (RETURNING)
+        # e os dados do cardápio já estão em items_map, então não é preciso recarregar nada
         response_items = []
-        for order_item in order_items:
-            db.refresh(order_item)
-            # Carregar o item completo
-            item = db.query(Item).filter(Item.id == order_item.item_id).first()
+        for item_data in order_items_data:
+            item = items_map[item_data['item_id']]
 
             response_items.append(
                 {
-                    'id': order_item.id,
-                    'item_id': order_item.item_id,
-                    'quantity': order_item.quantity,
-                    'unit_price': order_item.unit_price,
-                    'subtotal': order_item.total_price,
-                    'observations': order_item.notes,
+                    'id': order_item_ids[item_data['item_id']],
+                    'item_id': item_data['item_id'],
+                    'quantity': item_data['quantity'],
+                    'unit_price': item_data['unit_price'],
+                    'subtotal': item_data['total_price'],
+                    'observations': item_data['notes'],
                     'item': {
                         'id': item.id,
                         'name': item.name,
@@ -197,10 +278,10 @@ async def create_order(
         return response_data
 
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro interno do servidor: {str(e)}'
         )
@@ -208,59 +289,51 @@ async def create_order(
 
 @order_router.get('/my-orders', response_model=List[OrderSummary])
 async def list_my_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
     status_filter: str = None,
+    cursor: Optional[str] = None,
     current_user_id: int = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Listar pedidos do usuário autenticado
+    Listar pedidos do usuário autenticado (mais recentes primeiro)
+
+    A próxima página é obtida passando em `cursor` o valor do cabeçalho X-Next-Cursor
     """
-    query = db.query(Order).filter(Order.user_id == current_user_id)
+    query = select(Order).where(Order.user_id == current_user_id)
 
     if status_filter:
-        query = query.filter(Order.status == status_filter)
-
-    orders = query.offset(skip).limit(limit).all()
-
-    # Converter para OrderSummary
-    orders_summary = []
-    for order in orders:
-        items_count = len(order.items) if hasattr(order, 'items') else 0
-        orders_summary.append(
-            OrderSummary(
-                id=order.id,
-                order_number=order.order_number,
-                customer_name=order.customer_name,
-                status=order.status,
-                total_amount=order.total_amount,
-                created_at=order.created_at,
-                items_count=items_count,
-            )
-        )
+        query = query.where(Order.status == status_filter)
+
+    orders = (await db.scalars(keyset_page(query, Order, cursor, limit).offset(skip))).all()
+    orders = set_next_cursor(response, orders, limit)
 
-    return orders_summary
+    return await build_order_summaries(db, orders)
 
 
 @order_router.get('/{order_id}', response_model=OrderResponse)
-async def get_order(order_id: int, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_order(
+    order_id: int, current_user: CurrentUser = Depends(get_current_user_obj), db: AsyncSession = Depends(get_db)
+):
     """
     Buscar pedido por ID - usuário só pode ver seus próprios pedidos ou admin pode ver todos
     """
     try:
-        order = db.query(Order).filter(Order.id == order_id).first()
+        # Buscar pedido e itens (com dados do cardápio) em 2 consultas: as linhas são carregadas
+        # com JOIN em items; a permissão vem do usuário atual já carregado pela dependência
+        order = await db.scalar(
+            select(Order)
+            .options(selectinload(Order.order_items).joinedload(OrderItem.item))
+            .where(Order.id == order_id)
+        )
 
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pedido não encontrado')
 
-        # Verificar se o usuário tem permissão para ver este pedido
-        user = db.query(User).filter(User.id == current_user_id).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Usuário não encontrado')
-        
         # Se não for admin e não for o dono do pedido, negar acesso
-        if not user.is_admin and order.user_id != current_user_id:
+        if not current_user.is_admin and order.user_id != current_user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Acesso negado ao pedido')
 
         # Construir resposta manualmente para compatibilidade com o schema
@@ -270,9 +343,9 @@ async def get_order(order_id: int, current_user_id: int = Depends(get_current_us
         if hasattr(order, 'order_items') and order.order_items:
             for order_item in order.order_items:
                 try:
-                    # Carregar o item completo
-                    item = db.query(Item).filter(Item.id == order_item.item_id).first()
-                    
+                    # Item do cardápio já carregado junto com a linha do pedido
+                    item = order_item.item
+
                     if item:
                         response_items.append(
                             {
@@ -288,7 +361,7 @@ async def get_order(order_id: int, current_user_id: int = Depends(get_current_us
                                     'description': item.description or "",
                                     'category': item.category.value if hasattr(item.category, 'value') else str(item.category),
                                     'size': item.size.value if hasattr(item.size, 'value') else str(item.size),
-                                    'price': float(item.price),
+                                    'price': item.price,
                                     'is_available': item.is_available,
                                     'preparation_time': item.preparation_time,
                                     'ingredients': item.ingredients or [],
@@ -317,9 +390,9 @@ async def get_order(order_id: int, current_user_id: int = Depends(get_current_us
             'observations': order.observations or "",
             'status': order.status,
             'items': response_items,
-            'subtotal': float(order.subtotal) if order.subtotal else 0.0,
-            'delivery_fee': float(order.delivery_fee) if order.delivery_fee else 0.0,
-            'total_amount': float(order.total_amount) if order.total_amount else 0.0,
+            'subtotal': order.subtotal or ZERO,
+            'delivery_fee': order.delivery_fee or ZERO,
+            'total_amount': order.total_amount or ZERO,
             'estimated_delivery_time': order.estimated_delivery_time,
             'created_at': order.created_at,
             'updated_at': order.updated_at,
@@ -338,14 +411,15 @@ async def get_order(order_id: int, current_user_id: int = Depends(get_current_us
 
 @order_router.patch('/{order_id}/status')
 async def update_order_status(
-    order_id: int, new_status: str, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)
+    order_id: int,
+    new_status: str,
+    current_user: CurrentUser = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Atualizar status do pedido (apenas administradores)
     """
-    # Verificar se o usuário é admin
-    verify_admin_access(current_user_id, db)
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.get(Order, order_id)
 
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pedido não encontrado')
@@ -358,67 +432,54 @@ async def update_order_status(
             detail=f"Status inválido. Valores válidos: {', '.join(valid_statuses)}",
         )
 
+    old_status = order.status
     order.status = new_status
-    db.commit()
-    db.refresh(order)
+    await record_order_changed(db, order, old_status, order.total_amount)
+    await db.commit()
+    await db.refresh(order)
 
     return {'message': f'Status do pedido {order.order_number} atualizado para {new_status}'}
 
 
 @order_router.get('/admin/all-orders', response_model=List[OrderSummary])
 async def get_all_orders_admin(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
     status_filter: str = None,
-    current_user_id: int = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Obter todos os pedidos (apenas administradores)
-    """
-    # Verificar se o usuário é admin
-    verify_admin_access(current_user_id, db)
+    Obter todos os pedidos (apenas administradores), mais recentes primeiro
 
-    query = db.query(Order)
+    A próxima página é obtida passando em `cursor` o valor do cabeçalho X-Next-Cursor
+    """
+    query = select(Order)
 
     if status_filter:
-        query = query.filter(Order.status == status_filter)
-
-    orders = query.offset(skip).limit(limit).all()
-
-    # Converter para OrderSummary
-    orders_summary = []
-    for order in orders:
-        items_count = len(order.order_items) if hasattr(order, 'order_items') else 0
-        orders_summary.append(
-            OrderSummary(
-                id=order.id,
-                order_number=order.order_number,
-                customer_name=order.customer_name,
-                status=order.status,
-                total_amount=order.total_amount,
-                created_at=order.created_at,
-                items_count=items_count,
-            )
-        )
+        query = query.where(Order.status == status_filter)
 
-    return orders_summary
+    orders = (await db.scalars(keyset_page(query, Order, cursor, limit).offset(skip))).all()
+    orders = set_next_cursor(response, orders, limit)
+
+    return await build_order_summaries(db, orders)
 
 
 @order_router.delete('/{order_id}/cancel')
-async def cancel_order(order_id: int, current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)):
+async def cancel_order(
+    order_id: int, current_user: CurrentUser = Depends(get_current_user_obj), db: AsyncSession = Depends(get_db)
+):
     """
     Cancelar pedido (dono do pedido ou administrador)
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pedido não encontrado')
 
-    # Verificar permissão
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-
     # Verificar se é o dono do pedido ou admin
-    if order.user_id != current_user_id and not current_user.is_admin:
+    if order.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Sem permissão para cancelar este pedido')
 
     # Verificar se o pedido pode ser cancelado
@@ -428,39 +489,47 @@ async def cancel_order(order_id: int, current_user_id: int = Depends(get_current
             detail=f"Não é possível cancelar pedido com status '{order.status}'",
         )
 
+    old_status = order.status
     order.status = 'cancelado'
-    db.commit()
-    db.refresh(order)
+    await record_order_changed(db, order, old_status, order.total_amount)
+    await db.commit()
+    await db.refresh(order)
 
     return {'message': f'Pedido {order.order_number} cancelado com sucesso'}
 
 
 @order_router.get('/admin/stats')
-async def get_order_statistics(current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_order_statistics(
+    current_user: CurrentUser = Depends(get_current_admin), db: AsyncSession = Depends(get_db)
+):
     """
     Obter estatísticas de pedidos (apenas administradores)
     """
-    # Verificar se o usuário é admin
-    verify_admin_access(current_user_id, db)
-
-    from sqlalchemy import func
+    # Lê o consolidado diário (order_daily_stats), mantido a cada criação/alteração de pedido:
+    # o custo depende da quantidade de dias, não de pedidos. "Hoje" é o dia em UTC, como created_at
+    today = datetime.now(timezone.utc).date()
+    rows = (
+        await db.execute(
+            select(
+                OrderDailyStats.status,
+                func.sum(OrderDailyStats.orders_count).label('orders'),
+                func.sum(OrderDailyStats.revenue).label('revenue'),
+                func.coalesce(func.sum(OrderDailyStats.orders_count).filter(OrderDailyStats.day == today), 0).label(
+                    'orders_today'
+                ),
+            ).group_by(OrderDailyStats.status)
+        )
+    ).all()
+    by_status = {row.status: row for row in rows}
 
-    # Estatísticas gerais
-    total_orders = db.query(Order).count()
-    orders_by_status = db.query(Order.status, func.count(Order.id).label('count')).group_by(Order.status).all()
+    total_orders = sum(row.orders for row in rows)
+    orders_today = sum(row.orders_today for row in rows)
 
     # Receita total (excluindo cancelados)
-    total_revenue = db.query(func.sum(Order.total_amount)).filter(Order.status != 'cancelado').scalar() or 0
-
-    # Pedidos de hoje
-    from datetime import date, datetime
-
-    today = date.today()
-    orders_today = db.query(Order).filter(func.date(Order.created_at) == today).count()
+    total_revenue = sum((row.revenue for row in rows if row.status != 'cancelado'), ZERO)
 
     # Ticket médio
-    completed_orders = db.query(Order).filter(Order.status.in_(['entregue'])).count()
-
+    completed_orders = by_status['entregue'].orders if 'entregue' in by_status else 0
     average_ticket = total_revenue / completed_orders if completed_orders > 0 else 0
 
     return {
@@ -468,7 +537,11 @@ async def get_order_statistics(current_user_id: int = Depends(get_current_user),
         'orders_today': orders_today,
         'total_revenue': float(total_revenue),
         'average_ticket': float(average_ticket),
-        'orders_by_status': [{'status': status.code if hasattr(status, 'code') else str(status), 'count': count} for status, count in orders_by_status],
+        'orders_by_status': [
+            {'status': code, 'count': by_status[code].orders}
+            for code, _ in Order.STATUS_CHOICES
+            if code in by_status and by_status[code].orders > 0
+        ],
     }
 
 
@@ -477,14 +550,14 @@ async def add_item_to_order(
     order_id: int,
     item_data: OrderItemAdd,
     current_user_id: int = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Adicionar item a um pedido existente (apenas o dono do pedido)
     """
     try:
         # Buscar o pedido
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pedido não encontrado')
         
@@ -496,14 +569,14 @@ async def add_item_to_order(
             )
         
         # Verificar se o pedido pode ser modificado
-        if order.status in ['entregue', 'cancelado', 'saiu_entrega']:
+        if not validate_order_modification(order):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f'Não é possível modificar pedido com status: {order.status}'
             )
         
         # Buscar o item do cardápio
-        item = db.query(Item).filter(Item.id == item_data.item_id).first()
+        item = await db.get(Item, item_data.item_id)
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Item não encontrado no cardápio')
         
@@ -514,94 +587,62 @@ async def add_item_to_order(
                 detail=f'Item "{item.name}" não está disponível'
             )
         
-        # Verificar se o item já existe no pedido
-        existing_order_item = db.query(OrderItem).filter(
-            OrderItem.order_id == order_id,
-            OrderItem.item_id == item_data.item_id
-        ).first()
+        # Somar a quantidade à linha do item, se já existir no pedido, sem ler a linha antes
+        order_item = await increment_order_item(
+            db, order_id, item_data.item_id, item_data.quantity, item_data.observations
+        )
         
-        if existing_order_item:
-            # Atualizar quantidade do item existente
-            existing_order_item.quantity += item_data.quantity
-            
-            # Recalcular valores
-            unit_price = Decimal(str(item.price))
-            existing_order_item.total_price = safe_float(unit_price * Decimal(str(existing_order_item.quantity)))
-            
-            # Atualizar observações se fornecidas
-            if item_data.observations:
-                if existing_order_item.notes:
-                    existing_order_item.notes += f" | {item_data.observations}"
-                else:
-                    existing_order_item.notes = item_data.observations
-            
-            db_order_item = existing_order_item
+        if order_item:
+            total_delta = order_item['unit_price'] * item_data.quantity
         else:
             # Criar novo item no pedido
-            unit_price = Decimal(str(item.price))
-            total_price = unit_price * Decimal(str(item_data.quantity))
-            
-            new_order_item = OrderItem(
-                order_id=order_id,
-                item_id=item_data.item_id,
-                quantity=item_data.quantity,
-                unit_price=safe_float(unit_price),
-                total_price=safe_float(total_price),
-                notes=item_data.observations
-            )
-            
-            db.add(new_order_item)
-            db.flush()  # Para obter o ID
-            db_order_item = new_order_item
-        
-        # Recalcular totais do pedido
-        order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-        
-        subtotal = sum(Decimal(str(oi.total_price)) for oi in order_items)
-        delivery_fee = Decimal(str(order.delivery_fee)) if order.delivery_fee else Decimal('0.00')
-        total_amount = subtotal + delivery_fee
-        
-        # Atualizar pedido
-        order.subtotal = float(subtotal)
-        order.total_amount = float(total_amount)
+            order_item = {
+                'item_id': item_data.item_id,
+                'quantity': item_data.quantity,
+                'unit_price': item.price,
+                'total_price': item.price * item_data.quantity,
+                'notes': item_data.observations,
+            }
+            order_item['id'] = (await bulk_insert_order_items(db, order_id, [order_item]))[item_data.item_id]
+            total_delta = order_item['total_price']
         
-        # Recalcular tempo de preparo
-        item_ids = [oi.item_id for oi in order_items]
-        items_prep_times = db.query(Item.preparation_time).filter(Item.id.in_(item_ids)).all()
-        max_prep_time = max([pt[0] or 20 for pt in items_prep_times])
-        delivery_time = 30 if order.is_delivery else 0
-        order.estimated_delivery_time = max_prep_time + delivery_time
+        # Ajustar os totais do pedido só pela diferença da linha, de forma atômica
+        if not await increment_order_totals(db, order, total_delta, item_preparation_time(item)):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail='O pedido foi alterado por outra requisição e não aceita mais modificações',
+            )
+        await apply_order_stats(db, order, order.status, 0, total_delta)
         
-        db.commit()
-        db.refresh(db_order_item)
-        db.refresh(order)
+        await db.commit()
         
         return {
             'message': 'Item adicionado ao pedido com sucesso',
             'order_id': order.id,
             'order_number': order.order_number,
             'item_added': {
-                'id': db_order_item.id,
-                'item_id': db_order_item.item_id,
+                'id': order_item['id'],
+                'item_id': order_item['item_id'],
                 'item_name': item.name,
-                'quantity': db_order_item.quantity,
-                'unit_price': db_order_item.unit_price,
-                'total_price': db_order_item.total_price,
-                'observations': db_order_item.notes
+                'quantity': order_item['quantity'],
+                'unit_price': order_item['unit_price'],
+                'total_price': order_item['total_price'],
+                'observations': order_item['notes']
             },
             'new_totals': {
                 'subtotal': order.subtotal,
                 'delivery_fee': order.delivery_fee,
                 'total_amount': order.total_amount,
                 'estimated_delivery_time': order.estimated_delivery_time
-            }
+            },
+            'version': order.version
         }
         
-    except HTTPException:
-        db.rollback()
+    except (HTTPException, StaleDataError):
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f'Erro interno do servidor: {str(e)}'
@@ -613,14 +654,14 @@ async def remove_item_from_order(
     order_id: int,
     order_item_id: int,
     current_user_id: int = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Remover item de um pedido existente (apenas o dono do pedido)
     """
     try:
         # Buscar o pedido
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pedido não encontrado')
         
@@ -632,23 +673,27 @@ async def remove_item_from_order(
             )
         
         # Verificar se o pedido pode ser modificado
-        if order.status in ['entregue', 'cancelado', 'saiu_entrega']:
+        if not validate_order_modification(order):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f'Não é possível modificar pedido com status: {order.status}'
             )
         
-        # Buscar o item no pedido
-        order_item = db.query(OrderItem).filter(
-            OrderItem.id == order_item_id,
-            OrderItem.order_id == order_id
-        ).first()
+        # Buscar o item no pedido junto com o nome e o tempo de preparo do item do cardápio
+        row = (
+            await db.execute(
+                select(OrderItem, Item.name, Item.preparation_time)
+                .outerjoin(Item, Item.id == OrderItem.item_id)
+                .where(OrderItem.id == order_item_id, OrderItem.order_id == order_id)
+            )
+        ).one_or_none()
         
-        if not order_item:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail='Item não encontrado neste pedido'
             )
+        order_item, item_name, preparation_time = row
         
         # Guardar informações do item antes de remover
         removed_item_info = {
@@ -657,83 +702,210 @@ async def remove_item_from_order(
             'quantity': order_item.quantity,
             'unit_price': order_item.unit_price,
             'total_price': order_item.total_price,
-            'observations': order_item.notes
+            'observations': order_item.notes,
+            'item_name': item_name or f"Item ID {order_item.item_id}"
         }
         
-        # Buscar nome do item para resposta
-        item = db.query(Item).filter(Item.id == order_item.item_id).first()
-        item_name = item.name if item else f"Item ID {order_item.item_id}"
-        
-        # Remover o item do pedido
-        db.delete(order_item)
-        db.commit()  # Fazer commit da remoção primeiro
+        # Remover o item e recalcular os totais pelas linhas restantes na mesma transação
+        old_status, old_total = order.status, order.total_amount
+        await db.delete(order_item)
+        remaining_items_count = await apply_line_removed(db, order, preparation_time or DEFAULT_PREPARATION_TIME)
         
-        # Verificar se ainda há itens no pedido após a remoção
-        remaining_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-        
-        if not remaining_items:
+        if not remaining_items_count:
             # Se não há mais itens, cancelar o pedido
             order.status = 'cancelado'
-            order.subtotal = 0.0
-            order.total_amount = 0.0
-            order.estimated_delivery_time = None
-            
-            db.commit()
-            
+        
+        await record_order_changed(db, order, old_status, old_total)
+        
+        # Um único commit para remoção, totais e status
+        await db.commit()
+        
+        if not remaining_items_count:
             return {
                 'message': 'Item removido do pedido. Pedido cancelado pois não há mais itens.',
                 'order_id': order.id,
                 'order_number': order.order_number,
                 'order_status': 'cancelado',
-                'item_removed': {
-                    **removed_item_info,
-                    'item_name': item_name
-                }
+                'item_removed': removed_item_info
             }
         
-        # Recalcular totais do pedido
-        subtotal = sum(Decimal(str(oi.total_price)) for oi in remaining_items)
-        delivery_fee = Decimal(str(order.delivery_fee)) if order.delivery_fee else Decimal('0.00')
-        total_amount = subtotal + delivery_fee
-        
-        # Atualizar pedido
-        order.subtotal = float(subtotal)
-        order.total_amount = float(total_amount)
-        
-        # Recalcular tempo de preparo
-        item_ids = [oi.item_id for oi in remaining_items]
-        items_prep_times = db.query(Item.preparation_time).filter(Item.id.in_(item_ids)).all()
-        max_prep_time = max([pt[0] or 20 for pt in items_prep_times])
-        delivery_time = 30 if order.is_delivery else 0
-        order.estimated_delivery_time = max_prep_time + delivery_time
-        
-        db.commit()
-        db.refresh(order)
-        
         return {
             'message': 'Item removido do pedido com sucesso',
             'order_id': order.id,
             'order_number': order.order_number,
             'order_status': order.status,
-            'item_removed': {
-                **removed_item_info,
-                'item_name': item_name
-            },
+            'item_removed': removed_item_info,
             'new_totals': {
                 'subtotal': order.subtotal,
                 'delivery_fee': order.delivery_fee,
                 'total_amount': order.total_amount,
                 'estimated_delivery_time': order.estimated_delivery_time
             },
-            'remaining_items_count': len(remaining_items)
+            'remaining_items_count': remaining_items_count,
+            'version': order.version
         }
         
-    except HTTPException:
-        db.rollback()
+    except (HTTPException, StaleDataError):
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f'Erro interno do servidor: {str(e)}'
         )
+
+
+@order_router.patch('/{order_id}/items', status_code=status.HTTP_200_OK)
+async def update_order_items(
+    order_id: int,
+    batch: OrderItemsBatch,
+    current_user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Alterar vários itens de um pedido de uma vez (apenas o dono do pedido)
+
+    As operações (add, remove, set_quantity) são aplicadas em ordem sobre as linhas do pedido,
+    carregadas em uma única consulta; os totais são recalculados uma vez no final e tudo é
+    gravado em uma única transação: ou todas as operações valem, ou nenhuma. Se o pedido ficar
+    sem itens, ele é cancelado, como na remoção individual.
+    """
+    try:
+        # Buscar o pedido e fazer as verificações uma única vez para o lote inteiro
+        order = await db.get(Order, order_id)
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pedido não encontrado')
+
+        if order.user_id != current_user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail='Você só pode modificar seus próprios pedidos'
+            )
+
+        if not validate_order_modification(order):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Não é possível modificar pedido com status: {order.status}',
+            )
+
+        if batch.version is not None and batch.version != order.version:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail='O pedido foi alterado por outra requisição. Recarregue e tente novamente.',
+            )
+
+        # Linhas do pedido e itens do cardápio envolvidos: uma consulta para cada
+        lines = {
+            line.id: line
+            for line in await db.scalars(select(OrderItem).where(OrderItem.order_id == order_id).order_by(OrderItem.id))
+        }
+        item_ids = {line.item_id for line in lines.values()}
+        item_ids.update(
+            operation.item_id for operation in batch.operations if operation.op == OrderItemOperationType.ADD
+        )
+        items = {item.id: item for item in await db.scalars(select(Item).where(Item.id.in_(item_ids)))}
+
+        added_lines = []
+        for operation in batch.operations:
+            if operation.op == OrderItemOperationType.ADD:
+                item = items.get(operation.item_id)
+                if not item:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f'Item {operation.item_id} não encontrado no cardápio',
+                    )
+                if not item.is_available:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST, detail=f'Item "{item.name}" não está disponível'
+                    )
+
+                # Somar na linha do item, se já existir no pedido (como na adição individual)
+                line = next((line for line in [*lines.values(), *added_lines] if line.item_id == item.id), None)
+                if line is None:
+                    line = OrderItem(order_id=order.id, item_id=item.id, quantity=0, unit_price=item.price)
+                    db.add(line)
+                    added_lines.append(line)
+
+                line.quantity += operation.quantity
+                if operation.observations:
+                    line.notes = f'{line.notes} | {operation.observations}' if line.notes else operation.observations
+            else:
+                line = lines.get(operation.order_item_id)
+                if not line:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f'Item {operation.order_item_id} não encontrado neste pedido',
+                    )
+
+                if operation.op == OrderItemOperationType.REMOVE:
+                    del lines[line.id]
+                    await db.delete(line)
+                    continue
+
+                line.quantity = operation.quantity
+
+            line.total_price = line.unit_price * line.quantity
+
+        # Um único recálculo dos totais com as linhas resultantes
+        remaining_lines = [*lines.values(), *added_lines]
+        old_status, old_total = order.status, order.total_amount
+        recalculate_order_totals(
+            order,
+            (
+                (
+                    line.total_price,
+                    item_preparation_time(items[line.item_id]) if line.item_id in items else DEFAULT_PREPARATION_TIME,
+                )
+                for line in remaining_lines
+            ),
+        )
+        if not remaining_lines:
+            order.status = 'cancelado'
+
+        # O version_id_col só incrementa a versão quando alguma coluna de orders muda no flush. Um lote que
+        # altera apenas as linhas (ex.: observações, ou quantidades com o mesmo total) não emitiria o UPDATE
+        # do pedido e a versão devolvida ao cliente não mudaria. Com o valor atribuído, o SQLAlchemy emite o
+        # UPDATE condicionado à versão lida e usa esse valor em vez de gerar outro (incremento único).
+        order.version = order.version + 1
+        await record_order_changed(db, order, old_status, old_total)
+
+        await db.commit()
+
+        return {
+            'message': (
+                'Itens do pedido atualizados com sucesso'
+                if remaining_lines
+                else 'Itens removidos do pedido. Pedido cancelado pois não há mais itens.'
+            ),
+            'order_id': order.id,
+            'order_number': order.order_number,
+            'order_status': order.status,
+            'items': [
+                {
+                    'id': line.id,
+                    'item_id': line.item_id,
+                    'item_name': items[line.item_id].name if line.item_id in items else f'Item ID {line.item_id}',
+                    'quantity': line.quantity,
+                    'unit_price': line.unit_price,
+                    'total_price': line.total_price,
+                    'observations': line.notes,
+                }
+                for line in remaining_lines
+            ],
+            'new_totals': {
+                'subtotal': order.subtotal,
+                'delivery_fee': order.delivery_fee,
+                'total_amount': order.total_amount,
+                'estimated_delivery_time': order.estimated_delivery_time,
+            },
+            'version': order.version,
+        }
+
+    except (HTTPException, StaleDataError):
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Erro interno do servidor: {str(e)}'
+        )
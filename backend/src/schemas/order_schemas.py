@@ -84,6 +84,66 @@ class OrderItemRemove(BaseModel):
         }
 
 
+class OrderItemOperationType(str, Enum):
+    """Operações aceitas na alteração em lote dos itens de um pedido"""
+
+    ADD = 'add'
+    REMOVE = 'remove'
+    SET_QUANTITY = 'set_quantity'
+
+
+class OrderItemOperation(BaseModel):
+    """
+    Uma alteração nos itens do pedido
+
+    - add: soma `quantity` unidades de `item_id` (na linha existente do item, se houver)
+    - remove: remove a linha `order_item_id`
+    - set_quantity: define a quantidade da linha `order_item_id`
+    """
+
+    op: OrderItemOperationType = Field(..., description='Operação: add, remove ou set_quantity')
+    item_id: Optional[int] = Field(None, description='ID do item do cardápio (add)')
+    order_item_id: Optional[int] = Field(None, description='ID do item no pedido (remove e set_quantity)')
+    quantity: Optional[int] = Field(None, ge=1, le=50, description='Quantidade (1-50; add e set_quantity)')
+    observations: Optional[str] = Field(None, max_length=500, description='Observações do item (add)')
+
+    @validator('quantity', always=True)
+    def validate_operation_fields(cls, v, values):
+        """Conferir os campos exigidos por cada operação"""
+        op = values.get('op')
+        if op == OrderItemOperationType.ADD and values.get('item_id') is None:
+            raise ValueError('A operação add exige item_id')
+        if op in (OrderItemOperationType.REMOVE, OrderItemOperationType.SET_QUANTITY):
+            if values.get('order_item_id') is None:
+                raise ValueError(f'A operação {op.value} exige order_item_id')
+        if op != OrderItemOperationType.REMOVE and v is None:
+            raise ValueError('Informe a quantidade')
+        return v
+
+
+class OrderItemsBatch(BaseModel):
+    """Schema para alterar vários itens de um pedido em uma única requisição"""
+
+    operations: List[OrderItemOperation] = Field(
+        ..., min_length=1, max_length=50, description='Operações aplicadas em ordem (1-50)'
+    )
+    version: Optional[int] = Field(
+        None, description='Versão do pedido conhecida pelo cliente; se diferente da atual, nada é alterado (409)'
+    )
+
+    class Config:
+        schema_extra = {
+            'example': {
+                'operations': [
+                    {'op': 'add', 'item_id': 3, 'quantity': 2},
+                    {'op': 'set_quantity', 'order_item_id': 120, 'quantity': 1},
+                    {'op': 'remove', 'order_item_id': 121},
+                ],
+                'version': 4,
+            }
+        }
+
+
 # === SCHEMAS DE ITENS ===
 
 
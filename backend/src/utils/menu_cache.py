@@ -0,0 +1,78 @@
+"""
+Cache em memória das leituras públicas do cardápio
+"""
+import gzip
+import hashlib
+import os
+from typing import List, NamedTuple, Optional
+
+from pydantic import TypeAdapter
+
+from ..schemas.item_schemas import ItemResponse
+from .ttl_cache import TTLCache
+
+# Tempo máximo que uma entrada fica no cache (limita o atraso entre workers diferentes)
+MENU_CACHE_TTL_SECONDS = float(os.getenv('MENU_CACHE_TTL_SECONDS', '300'))
+
+# Quantidade máxima de entradas (categoria/disponibilidade/página) mantidas em memória
+MENU_CACHE_MAX_ENTRIES = int(os.getenv('MENU_CACHE_MAX_ENTRIES', '512'))
+
+# Payloads menores que isso não compensam a versão comprimida
+MENU_GZIP_MIN_SIZE = 500
+
+_menu_adapter = TypeAdapter(List[ItemResponse])
+
+
+class MenuPayload(NamedTuple):
+    """
+    Cardápio já serializado em JSON (e comprimido com gzip, se compensar)
+
+    A ETag forte é derivada do hash dos bytes: igual em todos os workers e após as
+    recargas do TTL enquanto o cardápio não muda, e diferente a cada alteração real.
+    """
+
+    body: bytes
+    gzip_body: Optional[bytes]
+    etag: str
+
+
+def serialize_menu(items) -> MenuPayload:
+    """
+    Valida e serializa a lista de itens uma única vez, gerando os bytes prontos
+    para todas as requisições seguintes da mesma versão do cardápio
+    """
+    body = _menu_adapter.dump_json(_menu_adapter.validate_python(items, from_attributes=True))
+    gzip_body = gzip.compress(body) if len(body) >= MENU_GZIP_MIN_SIZE else None
+    return MenuPayload(body, gzip_body, f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+
+
+class MenuCache(TTLCache):
+    """
+    Cache versionado do cardápio
+
+    As rotas de escrita do administrador chamam invalidate(), que incrementa a versão e
+    descarta as entradas. Uma leitura só grava no cache se a versão não mudou enquanto
+    consultava o banco, evitando guardar um cardápio anterior à última escrita.
+    A invalidação é local ao processo; o TTL limita o atraso nos demais workers.
+    """
+
+    def __init__(self, ttl_seconds: float = MENU_CACHE_TTL_SECONDS, max_entries: int = MENU_CACHE_MAX_ENTRIES):
+        super().__init__(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Verifica se o cabeçalho If-None-Match do cliente corresponde à ETag atual
+    (aceita lista separada por vírgulas, '*' e o prefixo fraco W/)
+    """
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+menu_cache = MenuCache()
@@ -0,0 +1,55 @@
+"""
+Valores monetários em centavos
+
+No banco, preços e totais são inteiros em centavos (o tipo de coluna Money): somas e
+multiplicações por quantidade são exatas, inclusive dentro do SQL (SUM, UPDATE com
+incremento), sem arredondamentos de ponto flutuante. No Python, os valores aparecem como
+Decimal com 2 casas, que somam e multiplicam sem perder centavos e são serializados como
+número na API.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Union
+
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+MoneyValue = Union[Decimal, int, float]
+
+ZERO = Decimal('0.00')
+
+
+def to_cents(value: MoneyValue) -> int:
+    """Converte um valor em reais (Decimal, int ou float) para centavos, arredondando meio centavo para cima"""
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        return round(value * 100)
+    return int((value * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Converte centavos para Decimal com 2 casas"""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def to_money(value: MoneyValue) -> Decimal:
+    """Normaliza um valor em reais para Decimal com 2 casas"""
+    return from_cents(to_cents(value))
+
+
+class Money(TypeDecorator):
+    """
+    Coluna monetária: inteiro em centavos no banco, Decimal com 2 casas no Python
+
+    Literais comparados ou somados à coluna (ex.: `Order.subtotal + delta`) também são
+    convertidos para centavos.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
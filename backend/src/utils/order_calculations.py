@@ -1,73 +1,160 @@
 """
 Utilitários para cálculos de pedidos
+
+Os totais do pedido são mantidos por deltas: incluir ou alterar uma linha ajusta o
+subtotal apenas pela diferença daquela linha, e o tempo de preparo é o maior entre o
+já guardado no pedido e o do item alterado. Nenhuma alteração relê todas as linhas; a
+remoção consulta o banco com uma única agregação (SUM/COUNT das linhas restantes). A
+alteração em lote, que já carrega todas as linhas do pedido, recalcula os totais uma
+única vez no final.
 """
 from decimal import Decimal
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.item import Item
 from ..models.order import Order
 from ..models.order_item import OrderItem
-from ..models.item import Item
+from .money import ZERO, MoneyValue, to_money
+
+# Tempo de preparo assumido para itens sem preparation_time (minutos)
+DEFAULT_PREPARATION_TIME = 20
+
+# Tempo acrescentado ao preparo nos pedidos para entrega (minutos)
+DELIVERY_TIME = 30
+
+# Taxa cobrada nos pedidos para entrega
+DELIVERY_FEE = Decimal('5.00')
+
+# Status em que o pedido não aceita mais alterações nos itens
+LOCKED_STATUSES = ('entregue', 'cancelado', 'saiu_entrega')
+
+
+def item_preparation_time(item: Item) -> int:
+    """Tempo de preparo do item do cardápio, com o padrão para itens sem valor"""
+    return item.preparation_time or DEFAULT_PREPARATION_TIME
+
 
+def estimate_delivery_time(preparation_time: int, is_delivery: bool) -> int:
+    """Tempo estimado do pedido: maior preparo entre as linhas + deslocamento se for entrega"""
+    return preparation_time + (DELIVERY_TIME if is_delivery else 0)
 
-def recalculate_order_totals(order: Order, db: Session) -> dict:
+
+def order_preparation_time(order: Order) -> Optional[int]:
+    """Maior tempo de preparo entre as linhas, já embutido no tempo estimado do pedido"""
+    if order.estimated_delivery_time is None:
+        return None
+    return order.estimated_delivery_time - (DELIVERY_TIME if order.is_delivery else 0)
+
+
+def recalculate_order_totals(order: Order, lines: Iterable[Tuple[Decimal, int]]):
     """
-    Recalcula todos os totais de um pedido baseado nos itens atuais
-    
-    Args:
-        order: Instância do pedido a ser recalculado
-        db: Sessão do banco de dados
-        
-    Returns:
-        dict: Dicionário com os novos valores calculados
+    Recalcula subtotal, total e tempo estimado a partir das linhas já carregadas, sem consultar o banco
+
+    lines: pares (total da linha, tempo de preparo do item); sem linhas, os valores são zerados
     """
-    # Buscar todos os itens do pedido
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-    
-    if not order_items:
-        # Se não há itens, zerar totais
-        order.subtotal = 0.0
-        order.total_amount = 0.0
+    subtotal, preparation_time = ZERO, None
+    for total_price, line_preparation_time in lines:
+        subtotal += total_price
+        preparation_time = max(preparation_time or 0, line_preparation_time)
+
+    if preparation_time is None:
+        order.subtotal = ZERO
+        order.total_amount = ZERO
         order.estimated_delivery_time = None
-        
-        return {
-            'subtotal': 0.0,
-            'delivery_fee': order.delivery_fee or 0.0,
-            'total_amount': 0.0,
-            'estimated_delivery_time': None,
-            'items_count': 0
-        }
-    
-    # Calcular subtotal
-    subtotal = sum(Decimal(str(oi.total_price)) for oi in order_items)
-    
-    # Taxa de entrega
-    delivery_fee = Decimal(str(order.delivery_fee)) if order.delivery_fee else Decimal('0.00')
-    
-    # Total final
-    total_amount = subtotal + delivery_fee
-    
-    # Recalcular tempo de preparo
-    item_ids = [oi.item_id for oi in order_items]
-    items_prep_times = db.query(Item.preparation_time).filter(Item.id.in_(item_ids)).all()
-    max_prep_time = max([pt[0] or 20 for pt in items_prep_times]) if items_prep_times else 20
-    delivery_time = 30 if order.is_delivery else 0
-    estimated_delivery_time = max_prep_time + delivery_time
-    
-    # Atualizar o pedido
-    order.subtotal = float(subtotal)
-    order.total_amount = float(total_amount)
-    order.estimated_delivery_time = estimated_delivery_time
-    
-    return {
-        'subtotal': float(subtotal),
-        'delivery_fee': float(delivery_fee),
-        'total_amount': float(total_amount),
-        'estimated_delivery_time': estimated_delivery_time,
-        'items_count': len(order_items)
+        return
+
+    order.subtotal = subtotal
+    order.total_amount = subtotal + (order.delivery_fee or ZERO)
+    order.estimated_delivery_time = estimate_delivery_time(preparation_time, order.is_delivery)
+
+
+async def increment_order_totals(
+    db: AsyncSession, order: Order, total_delta: Decimal, preparation_time: Optional[int] = None
+) -> bool:
+    """
+    Contabiliza uma linha nova ou com quantidade alterada em um único UPDATE ... RETURNING atômico
+
+    Os totais são somados no próprio banco (sem ler-alterar-gravar), então alterações
+    simultâneas do mesmo pedido não se sobrescrevem e não precisam de lock nem de nova
+    tentativa. A versão do pedido é incrementada e os valores resultantes são copiados para
+    `order` sem marcá-lo como alterado. Retorna False se o pedido deixou de aceitar
+    modificações (nada é alterado).
+
+    total_delta: diferença do total da linha (o total inteiro se a linha é nova)
+    preparation_time: tempo de preparo do item da linha
+    """
+    table = Order.__table__
+    values = {
+        'subtotal': table.c.subtotal + total_delta,
+        'total_amount': table.c.total_amount + total_delta,
+        'version': table.c.version + 1,
     }
+    if preparation_time is not None:
+        estimated = estimate_delivery_time(preparation_time, order.is_delivery)
+        values['estimated_delivery_time'] = case(
+            (
+                or_(table.c.estimated_delivery_time.is_(None), table.c.estimated_delivery_time < estimated),
+                estimated,
+            ),
+            else_=table.c.estimated_delivery_time,
+        )
+
+    statement = (
+        update(table)
+        .where(table.c.id == order.id, table.c.status.notin_(LOCKED_STATUSES))
+        .values(values)
+        .returning(
+            table.c.subtotal, table.c.total_amount, table.c.estimated_delivery_time, table.c.version, table.c.status
+        )
+    )
+    row = (await db.execute(statement)).one_or_none()
+    if row is None:
+        return False
+
+    for key, value in row._mapping.items():
+        set_committed_value(order, key, value)
+    return True
+
+
+async def apply_line_removed(db: AsyncSession, order: Order, preparation_time: int) -> int:
+    """
+    Contabiliza a remoção de uma linha (já apagada na sessão) e retorna quantas linhas restam
+
+    Contagem e subtotal das linhas restantes saem de uma única agregação (COUNT/SUM), na mesma
+    transação da remoção; o maior tempo de preparo só entra nela quando o item removido era o
+    mais demorado do pedido.
+    """
+    await db.flush()
+
+    current = order_preparation_time(order)
+    recalculate_preparation = current is None or preparation_time >= current
+    columns = [func.count(OrderItem.id), func.coalesce(func.sum(OrderItem.total_price), 0)]
+    if recalculate_preparation:
+        columns.append(func.max(func.coalesce(Item.preparation_time, DEFAULT_PREPARATION_TIME)))
+        query = select(*columns).outerjoin(Item, Item.id == OrderItem.item_id)
+    else:
+        query = select(*columns)
+    row = (await db.execute(query.where(OrderItem.order_id == order.id))).one()
+    remaining_items = row[0]
+
+    if not remaining_items:
+        order.subtotal = ZERO
+        order.total_amount = ZERO
+        order.estimated_delivery_time = None
+        return remaining_items
+
+    order.subtotal = row[1]
+    order.total_amount = row[1] + (order.delivery_fee or ZERO)
+    if recalculate_preparation:
+        order.estimated_delivery_time = estimate_delivery_time(row[2], order.is_delivery)
+    return remaining_items
 
 
-def calculate_item_subtotal(unit_price: float, quantity: int) -> float:
+def calculate_item_subtotal(unit_price: MoneyValue, quantity: int) -> Decimal:
     """
     Calcula o subtotal de um item específico
     
@@ -76,9 +163,9 @@ def calculate_item_subtotal(unit_price: float, quantity: int) -> float:
         quantity: Quantidade do item
         
     Returns:
-        float: Subtotal calculado
+        Decimal: Subtotal calculado (2 casas)
     """
-    return float(Decimal(str(unit_price)) * Decimal(str(quantity)))
+    return to_money(unit_price) * quantity
 
 
 def validate_order_modification(order: Order) -> bool:
@@ -91,5 +178,4 @@ def validate_order_modification(order: Order) -> bool:
     Returns:
         bool: True se pode ser modificado, False caso contrário
     """
-    forbidden_statuses = ['entregue', 'cancelado', 'saiu_entrega']
-    return order.status not in forbidden_statuses
\ No newline at end of file
+    return order.status not in LOCKED_STATUSES
\ No newline at end of file
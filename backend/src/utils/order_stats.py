@@ -0,0 +1,67 @@
+"""
+Manutenção incremental do consolidado diário de pedidos (order_daily_stats)
+"""
+from decimal import Decimal
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.base import utc_now
+from ..models.order import Order
+from ..models.order_daily_stats import OrderDailyStats
+from .money import ZERO
+
+
+def status_code(order_status) -> str:
+    """Código do status, seja um Choice carregado do banco ou uma string recém-atribuída"""
+    return getattr(order_status, 'code', order_status)
+
+
+async def apply_order_stats(db: AsyncSession, order: Order, status, orders_delta: int, revenue_delta: Decimal):
+    """
+    Soma os deltas na linha (dia do pedido, status) com um único upsert atômico,
+    criando a linha se ainda não existir
+    """
+    table = OrderDailyStats.__table__
+    dialect_insert = sqlite_insert if db.get_bind().dialect.name == 'sqlite' else postgresql_insert
+
+    statement = dialect_insert(table).values(
+        day=order.created_at.date(),
+        status=status_code(status),
+        orders_count=orders_delta,
+        revenue=revenue_delta,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.status],
+        set_={
+            'orders_count': table.c.orders_count + statement.excluded.orders_count,
+            'revenue': table.c.revenue + statement.excluded.revenue,
+            'updated_at': utc_now(),
+        },
+    )
+    await db.execute(statement)
+
+
+async def record_order_created(db: AsyncSession, order: Order):
+    """Contabiliza um pedido novo (após o flush, quando created_at já está preenchido)"""
+    await apply_order_stats(db, order, order.status, 1, order.total_amount or ZERO)
+
+
+async def record_order_changed(db: AsyncSession, order: Order, old_status, old_total: Decimal):
+    """
+    Move o pedido do status/total anterior para o atual
+
+    Mudança só de total ajusta a receita da mesma linha; mudança de status retira
+    o pedido da linha antiga e o soma na nova.
+    """
+    old_total = old_total or ZERO
+    new_total = order.total_amount or ZERO
+
+    if status_code(old_status) == status_code(order.status):
+        if new_total != old_total:
+            await apply_order_stats(db, order, order.status, 0, new_total - old_total)
+        return
+
+    await apply_order_stats(db, order, old_status, -1, -old_total)
+    await apply_order_stats(db, order, order.status, 1, new_total)
@@ -0,0 +1,54 @@
+"""
+Paginação por cursor (keyset) ordenada por (created_at, id), do mais recente para o mais antigo
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+
+# Cabeçalho com o cursor da próxima página (ausente na última página)
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Gera o token opaco que aponta para a posição logo após a linha informada"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lê o token gerado por encode_cursor; tokens inválidos resultam em 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Cursor de paginação inválido')
+
+
+def keyset_page(query: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """
+    Ordena a consulta por (created_at, id) decrescente e posiciona após o cursor
+
+    Busca uma linha a mais que o limite para saber se existe próxima página
+    (ver set_next_cursor).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def set_next_cursor(response: Response, rows: List, limit: int) -> List:
+    """Remove a linha extra buscada por keyset_page e publica o cursor da próxima página"""
+    if len(rows) <= limit:
+        return rows
+
+    rows = rows[:limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
@@ -0,0 +1,83 @@
+"""
+Pool de threads dedicado ao bcrypt (hash e verificação de senhas)
+
+O bcrypt leva centenas de milissegundos por chamada; executá-lo dentro dos handlers
+assíncronos trava o event loop para todas as outras requisições. Aqui ele roda em um
+executor de tamanho fixo com fila limitada: quando a fila enche, a requisição recebe
+503 na hora em vez de se acumular (e a API continua respondendo as demais rotas).
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+# Threads dedicadas ao bcrypt (o bcrypt libera o GIL, então elas rodam em paralelo)
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Chamadas que podem aguardar uma thread livre antes de recusar com 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', '32'))
+
+
+class PasswordHashingPool:
+    """
+    Executor limitado para as operações de senha, com métricas de fila
+
+    Os contadores só são alterados no event loop, então não precisam de lock.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Executor criado no primeiro uso"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    @property
+    def queued(self) -> int:
+        """Chamadas aguardando uma thread livre"""
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Executa func(*args) no pool, recusando com 503 quando a fila está cheia
+        """
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Servidor ocupado, tente novamente em instantes',
+                headers={'Retry-After': '1'},
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        """Estado atual do pool para a rota de métricas"""
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
+
+
+password_hashing_pool = PasswordHashingPool()
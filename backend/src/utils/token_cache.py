@@ -0,0 +1,73 @@
+"""
+Cache LRU dos access tokens já verificados
+
+Clientes que fazem polling reenviam o mesmo token centenas de vezes; com o cache, a
+verificação HMAC e a leitura das claims acontecem uma vez por token e as requisições
+seguintes custam uma consulta a um dicionário. Cada entrada vale até o `exp` do token.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Quantidade máxima de tokens verificados mantidos em memória
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', '10000'))
+
+
+class TokenCache:
+    """
+    LRU de hash do token -> (claims, exp)
+
+    A chave é o SHA-256 do token, para não manter tokens completos em memória. As
+    dependências síncronas do FastAPI rodam em threads, por isso o acesso usa um lock.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[Any]:
+        """Retorna as claims do token já verificado, ou None se ausente/expirado"""
+        key = self._key(token)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+
+            claims, expires_at = cached
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, token: str, claims: Any, expires_at: float):
+        """Guarda as claims até o exp do token, descartando o menos usado se cheio"""
+        if self.max_entries <= 0:
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Descarta todos os tokens verificados"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+access_token_cache = TokenCache()
@@ -0,0 +1,74 @@
+"""
+Lista de revogação dos access tokens por versão de segurança do usuário
+
+Os access tokens carregam as permissões do usuário e a sua versão de segurança (claim
+`sv`). Alterar is_admin/is_active incrementa users.security_version; a partir daí os
+tokens com versão anterior deixam de ser confiáveis e a permissão volta a ser lida do banco.
+"""
+import os
+import time
+from datetime import timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.base import utc_now
+from ..models.user import User
+
+# Intervalo entre sincronizações com o banco, para enxergar alterações feitas em outros workers
+TOKEN_REVOCATION_REFRESH_SECONDS = float(os.getenv('TOKEN_REVOCATION_REFRESH_SECONDS', '30'))
+
+# Folga na janela de updated_at para não perder alterações concorrentes com a sincronização
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+class TokenRevocationList:
+    """
+    Versão de segurança mínima aceita por usuário
+
+    As alterações feitas neste processo entram na hora (revoke); as dos demais workers
+    são lidas do banco a cada TOKEN_REVOCATION_REFRESH_SECONDS, em uma consulta pelos
+    usuários alterados desde a última sincronização (a primeira traz todos que já
+    tiveram a versão alterada).
+    """
+
+    def __init__(self, refresh_seconds: float = TOKEN_REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._versions = {}
+        self._synced_at = None
+        self._next_refresh = 0.0
+
+    def revoke(self, user_id: int, security_version: int):
+        """Invalida os tokens do usuário emitidos antes da versão informada"""
+        self._versions[user_id] = max(security_version, self._versions.get(user_id, 0))
+
+    def is_current(self, user_id: int, security_version: int) -> bool:
+        """Indica se um token com esta versão de segurança ainda pode ser confiado"""
+        return security_version >= self._versions.get(user_id, 0)
+
+    def reset(self):
+        """Esquece as revogações e considera a lista sincronizada agora"""
+        self._versions.clear()
+        self._synced_at = utc_now()
+        self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    async def refresh_if_due(self, db: AsyncSession):
+        """Sincroniza com o banco se o intervalo de atualização já passou"""
+        if time.monotonic() < self._next_refresh:
+            return
+        # Marcar antes de consultar evita que requisições simultâneas repitam a sincronização
+        self._next_refresh = time.monotonic() + self.refresh_seconds
+
+        synced_at = utc_now()
+        query = select(User.id, User.security_version)
+        if self._synced_at is None:
+            query = query.where(User.security_version > 1)
+        else:
+            query = query.where(User.updated_at >= self._synced_at - _REFRESH_OVERLAP)
+
+        for user_id, security_version in (await db.execute(query)).all():
+            self.revoke(user_id, security_version)
+        self._synced_at = synced_at
+
+
+token_revocations = TokenRevocationList()
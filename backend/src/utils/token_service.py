@@ -0,0 +1,167 @@
+"""
+Serviço de tokens JWT com implementação (backend) configurável
+
+Toda a assinatura e verificação de tokens da API passa por TokenService; trocar a
+biblioteca usada é só escolher outro backend em JWT_BACKEND, sem mexer nas rotas:
+
+- hmac: HS256/384/512 implementado com hmac/hashlib da biblioteca padrão (padrão, o mais rápido)
+- jose: python-jose, a implementação original
+- pyjwt: PyJWT, se estiver instalado
+
+Os tokens são intercambiáveis entre os backends (mesmo formato JWS compacto).
+"""
+import base64
+import binascii
+import calendar
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+# Claims de data que os backends convertem de datetime para timestamp
+_TIME_CLAIMS = ('exp', 'iat', 'nbf')
+
+
+class TokenError(Exception):
+    """Token malformado, com assinatura inválida ou expirado"""
+
+
+class JoseBackend:
+    """Backend com python-jose"""
+
+    def __init__(self, secret_key: str, algorithm: str):
+        from jose import JWTError, jwt
+
+        self._jwt = jwt
+        self._error = JWTError
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        return self._jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except self._error as exc:
+            raise TokenError(str(exc)) from exc
+
+
+class PyJWTBackend:
+    """Backend com PyJWT (dependência opcional)"""
+
+    def __init__(self, secret_key: str, algorithm: str):
+        try:
+            import jwt
+        except ImportError as exc:
+            raise RuntimeError('JWT_BACKEND=pyjwt requer o pacote PyJWT instalado') from exc
+
+        self._jwt = jwt
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        return self._jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except self._jwt.PyJWTError as exc:
+            raise TokenError(str(exc)) from exc
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class HMACBackend:
+    """
+    Backend próprio para os algoritmos HMAC (HS256/384/512)
+
+    Faz apenas o que a API precisa: confere o algoritmo do cabeçalho, a assinatura
+    (comparação em tempo constante) e as claims exp/nbf, sem as camadas genéricas
+    das bibliotecas JWT.
+    """
+
+    DIGESTS = {'HS256': hashlib.sha256, 'HS384': hashlib.sha384, 'HS512': hashlib.sha512}
+
+    def __init__(self, secret_key: str, algorithm: str):
+        if algorithm not in self.DIGESTS:
+            raise ValueError(f'Algoritmo não suportado pelo backend hmac: {algorithm}')
+
+        self.secret_key = secret_key.encode('utf-8')
+        self.algorithm = algorithm
+        self._digest = self.DIGESTS[algorithm]
+        self._header = _b64encode(
+            json.dumps({'alg': algorithm, 'typ': 'JWT'}, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        )
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return hmac.new(self.secret_key, signing_input, self._digest).digest()
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        claims = dict(payload)
+        for claim in _TIME_CLAIMS:
+            if isinstance(claims.get(claim), datetime):
+                claims[claim] = calendar.timegm(claims[claim].utctimetuple())
+
+        signing_input = self._header + b'.' + _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+        return (signing_input + b'.' + _b64encode(self._sign(signing_input))).decode('ascii')
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            signing_input, _, signature = token.encode('ascii').rpartition(b'.')
+            header_segment, _, payload_segment = signing_input.partition(b'.')
+            header = json.loads(_b64decode(header_segment))
+            if not isinstance(header, dict) or header.get('alg') != self.algorithm:
+                raise TokenError('Algoritmo do token não permitido')
+            if not hmac.compare_digest(_b64decode(signature), self._sign(signing_input)):
+                raise TokenError('Assinatura inválida')
+            payload = json.loads(_b64decode(payload_segment))
+        except (UnicodeError, binascii.Error, ValueError) as exc:
+            raise TokenError('Token malformado') from exc
+
+        if not isinstance(payload, dict):
+            raise TokenError('Payload do token inválido')
+
+        exp, nbf = payload.get('exp'), payload.get('nbf')
+        for claim, value in (('exp', exp), ('nbf', nbf)):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise TokenError(f'Claim {claim} inválida')
+
+        now = time.time()
+        if exp is not None and exp < now:
+            raise TokenError('Token expirado')
+        if nbf is not None and nbf > now:
+            raise TokenError('Token ainda não válido')
+        return payload
+
+
+BACKENDS = {'hmac': HMACBackend, 'jose': JoseBackend, 'pyjwt': PyJWTBackend}
+
+
+class TokenService:
+    """
+    Assinatura e verificação de tokens JWT com o backend escolhido
+    """
+
+    def __init__(self, secret_key: str, algorithm: str, backend: str = 'hmac'):
+        if backend not in BACKENDS:
+            raise ValueError(f"JWT_BACKEND inválido: {backend} (opções: {', '.join(BACKENDS)})")
+
+        self.backend_name = backend
+        self.backend = BACKENDS[backend](secret_key, algorithm)
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        """Assina o payload; datetimes em exp/iat/nbf viram timestamps"""
+        return self.backend.encode(payload)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verifica a assinatura e a validade do token, levantando TokenError se inválido"""
+        return self.backend.decode(token)
@@ -0,0 +1,49 @@
+"""
+Cache em memória com expiração (TTL) e invalidação por versão
+"""
+import time
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Cache local ao processo com tempo de vida por entrada
+
+    invalidate() incrementa a versão e uma leitura só é guardada se a versão não mudou
+    enquanto consultava o banco. Usado pelos caches do cardápio e dos usuários.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None se ausente/expirado"""
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+
+        expires_at, value = cached
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any, version: int) -> Any:
+        """Guarda o valor lido na versão informada (se ainda for a atual) e o retorna"""
+        if version == self.version:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                # Descartar a entrada mais antiga
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Descarta a entrada informada (ou todo o cache) após uma alteração nos dados"""
+        self.version += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -0,0 +1,19 @@
+"""
+Caches em memória dos dados de usuários
+"""
+import os
+
+from .ttl_cache import TTLCache
+
+# Estatísticas do painel de usuários; invalidadas em cadastro, criação de admin e
+# alteração de is_admin/is_active. O TTL limita o atraso nos demais workers.
+USER_STATS_CACHE_TTL_SECONDS = float(os.getenv('USER_STATS_CACHE_TTL_SECONDS', '30'))
+
+user_stats_cache = TTLCache(ttl_seconds=USER_STATS_CACHE_TTL_SECONDS, max_entries=1)
+
+# Usuário autenticado (CurrentUser: id, username, is_active, is_admin) por id; invalidado quando
+# o próprio usuário ou um admin altera esses dados
+CURRENT_USER_CACHE_TTL_SECONDS = float(os.getenv('CURRENT_USER_CACHE_TTL_SECONDS', '60'))
+CURRENT_USER_CACHE_MAX_ENTRIES = int(os.getenv('CURRENT_USER_CACHE_MAX_ENTRIES', '10000'))
+
+current_user_cache = TTLCache(ttl_seconds=CURRENT_USER_CACHE_TTL_SECONDS, max_entries=CURRENT_USER_CACHE_MAX_ENTRIES)
@@ -10,17 +10,25 @@ from unittest.mock import patch
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Adicionar o diretório backend ao sys.path
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
+# Custo mínimo do bcrypt para que os testes não passem a maior parte do tempo gerando hashes
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
 from src.config.database import get_db
 from src.config.security import hash_password
 from src.main import app
 from src.models import Item, Order, User
 from src.models.base import Base
+from src.utils.menu_cache import menu_cache
+from src.utils.token_revocation import token_revocations
+from src.utils.user_cache import current_user_cache, user_stats_cache
 
 
 # Configuração do banco de teste em memória
@@ -43,12 +51,26 @@ def test_engine():
     os.unlink(test_db.name)
 
 
+@pytest.fixture(scope='session')
+def test_async_engine(test_engine):
+    """Criar engine assíncrona (aiosqlite) apontando para o mesmo banco de teste"""
+    # NullPool: o TestClient pode usar um event loop diferente a cada requisição
+    engine = create_async_engine(test_engine.url.set(drivername='sqlite+aiosqlite'), poolclass=NullPool)
+
+    yield engine
+
+    engine.sync_engine.dispose()
+
+
 @pytest.fixture(scope='function')
 def test_db(test_engine):
     """Criar sessão de banco de dados para cada teste"""
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
     session = TestingSessionLocal()
+    # Os ids são reaproveitados após a limpeza das tabelas, então o usuário em cache e as revogações também
+    current_user_cache.invalidate()
+    token_revocations.reset()
     try:
         yield session
     finally:
@@ -62,16 +84,30 @@ def test_db(test_engine):
 
 
 @pytest.fixture(scope='function')
-def client(test_db):
+def async_session_factory(test_async_engine):
+    """Fábrica de sessões assíncronas usadas pelas rotas durante os testes"""
+    return async_sessionmaker(bind=test_async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture(scope='function')
+async def async_test_db(test_db, async_session_factory):
+    """Sessão assíncrona para testes que chamam funções assíncronas diretamente"""
+    async with async_session_factory() as session:
+        yield session
+
+
+@pytest.fixture(scope='function')
+def client(test_db, async_session_factory):
     """Cliente de teste do FastAPI com banco de dados isolado"""
 
-    def override_get_db():
-        try:
-            yield test_db
-        finally:
-            pass
+    async def override_get_db():
+        async with async_session_factory() as session:
+            yield session
 
     app.dependency_overrides[get_db] = override_get_db
+    # O banco é limpo entre os testes, então os caches também
+    menu_cache.invalidate()
+    user_stats_cache.invalidate()
 
     with TestClient(app) as test_client:
         yield test_client
@@ -79,6 +115,29 @@ def client(test_db):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def count_queries(test_async_engine):
+    """Contar as instruções SQL executadas pela API dentro de um bloco"""
+    from contextlib import contextmanager
+
+    from sqlalchemy import event
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_async_engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(test_async_engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+
+    return _count_queries
+
+
 @pytest.fixture
 def sample_user_data():
     """Dados de exemplo para criação de usuário"""
@@ -205,6 +264,8 @@ def create_test_item(test_db):
         test_db.add(item)
         test_db.commit()
         test_db.refresh(item)
+        # Item criado direto no banco (fora das rotas de admin): descartar o cardápio em cache
+        menu_cache.invalidate()
         return item
 
     return _create_item
@@ -373,6 +434,40 @@ def setup_single_item_order(client, auth_headers, create_test_item):
     return _create_single_item_order
 
 
+@pytest.fixture
+def create_items_with_preparation_times(test_db, create_test_item):
+    """Criar itens do cardápio com os tempos de preparo informados"""
+    def _create_items(preparation_times):
+        items = []
+        for i, preparation_time in enumerate(preparation_times):
+            item = create_test_item({'name': f'Pizza {i}', 'price': 10.0 + i, 'category': 'pizza'})
+            item.preparation_time = preparation_time
+            items.append(item)
+        test_db.commit()
+        return items
+
+    return _create_items
+
+
+@pytest.fixture
+def create_pickup_order(client):
+    """Criar pedido para retirada com uma linha por item"""
+    def _create_order(user_headers, items, quantity=1):
+        order_data = {
+            'customer_name': 'João Silva',
+            'customer_phone': '(11) 99999-9999',
+            'is_delivery': False,
+            'payment_method': 'pix',
+            'items': [{'item_id': item.id, 'quantity': quantity} for item in items],
+        }
+        response = client.post('/orders/create-order', headers=user_headers, json=order_data)
+        if response.status_code != 201:
+            pytest.fail(f'Falha ao criar pedido: {response.json()}')
+        return response.json()
+
+    return _create_order
+
+
 # Configuração para executar testes assíncronos
 @pytest.fixture(scope='session')
 def event_loop():
@@ -5,7 +5,12 @@ import sys
 from pathlib import Path
 
 import pytest
-from fastapi import status
+from fastapi import HTTPException, status
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.security import BCRYPT_ROUNDS, hash_password, password_needs_rehash, verify_password
+from src.routers import auth_routes
 
 # Adicionar o diretório backend ao sys.path se necessário
 backend_dir = Path(__file__).parent.parent.parent
@@ -136,15 +141,15 @@ class TestAuthEndpoints:
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
-    def test_login_inactive_user_fails(self, client, create_test_user, sample_user_data):
+    def test_login_inactive_user_fails(self, client, create_test_user, sample_user_data, test_db):
         """Testar login com usuário inativo"""
         # Criar usuário inativo
         user_data = sample_user_data.copy()
         user = create_test_user(user_data)
 
-        # Desativar usuário
+        # Desativar usuário (a API usa sua própria sessão, então é preciso persistir)
         user.is_active = False
-        # Note: test_db is passed implicitly via create_test_user fixture
+        test_db.commit()
 
         # Tentar fazer login
         login_data = {'email_or_username': sample_user_data['email'], 'password': sample_user_data['password']}
@@ -154,6 +159,75 @@ class TestAuthEndpoints:
         data = response.json()
         assert 'desativado' in data['detail']
 
+    def test_login_rehashes_outdated_cost(self, client, create_test_user, sample_user_data, test_db):
+        """Testar que o login refaz o hash gerado com custo diferente do configurado"""
+        user = create_test_user(sample_user_data)
+        user.hashed_password = hash_password(sample_user_data['password'], rounds=BCRYPT_ROUNDS + 1)
+        test_db.commit()
+
+        login_data = {'email_or_username': sample_user_data['email'], 'password': sample_user_data['password']}
+        response = client.post('/auth/login', json=login_data)
+
+        assert response.status_code == status.HTTP_200_OK
+        test_db.refresh(user)
+        assert not password_needs_rehash(user.hashed_password)
+        assert verify_password(sample_user_data['password'], user.hashed_password)
+
+    def test_login_skips_rehash_when_pool_is_busy(
+        self, client, create_test_user, sample_user_data, test_db, monkeypatch
+    ):
+        """Testar que o login com senha correta não falha nem refaz o hash com o pool do bcrypt ocupado"""
+        user = create_test_user(sample_user_data)
+        outdated_hash = hash_password(sample_user_data['password'], rounds=BCRYPT_ROUNDS + 1)
+        user.hashed_password = outdated_hash
+        test_db.commit()
+
+        async def pool_full(password):
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Servidor ocupado')
+
+        monkeypatch.setattr(auth_routes, 'hash_password_async', pool_full)
+        login_data = {'email_or_username': sample_user_data['email'], 'password': sample_user_data['password']}
+        response = client.post('/auth/login', json=login_data)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'access_token' in response.json()
+        test_db.refresh(user)
+        assert user.hashed_password == outdated_hash
+
+    def test_login_succeeds_when_rehash_commit_fails(
+        self, client, create_test_user, sample_user_data, test_db, monkeypatch
+    ):
+        """Testar que uma falha ao gravar o novo hash não impede o login com senha correta"""
+        user = create_test_user(sample_user_data)
+        outdated_hash = hash_password(sample_user_data['password'], rounds=BCRYPT_ROUNDS + 1)
+        user.hashed_password = outdated_hash
+        test_db.commit()
+
+        async def commit_fails(self):
+            raise OperationalError('UPDATE users', {}, Exception('database is locked'))
+
+        monkeypatch.setattr(AsyncSession, 'commit', commit_fails)
+        login_data = {'email_or_username': sample_user_data['email'], 'password': sample_user_data['password']}
+        response = client.post('/auth/login', json=login_data)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'access_token' in response.json()
+        assert response.json()['user']['email'] == sample_user_data['email']
+        test_db.refresh(user)
+        assert user.hashed_password == outdated_hash
+
+    def test_login_keeps_current_hash(self, client, create_test_user, sample_user_data, test_db):
+        """Testar que hashes com o custo configurado não são refeitos"""
+        user = create_test_user(sample_user_data)
+        hashed_password = user.hashed_password
+
+        form_data = {'username': sample_user_data['username'], 'password': sample_user_data['password']}
+        response = client.post('/auth/login-form', data=form_data)
+
+        assert response.status_code == status.HTTP_200_OK
+        test_db.refresh(user)
+        assert user.hashed_password == hashed_password
+
 
 @pytest.mark.integration
 @pytest.mark.auth
@@ -12,6 +12,8 @@ backend_dir = Path(__file__).parent.parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
+from src.utils.menu_cache import menu_cache  # noqa: E402
+
 
 @pytest.mark.integration
 @pytest.mark.items
@@ -366,6 +368,168 @@ class TestAdminItemEndpoints:
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
+@pytest.mark.integration
+@pytest.mark.items
+class TestMenuCacheEndpoints:
+    """Testes para o cache do cardápio nas leituras públicas"""
+
+    def test_public_menu_served_from_cache(self, client, create_test_item, count_queries):
+        """Testar que leituras repetidas do cardápio não consultam o banco"""
+        item = create_test_item()
+        first = client.get('/items/menu')
+
+        with count_queries() as statements:
+            second = client.get('/items/menu')
+            list_response = client.get('/items/list-items')
+            list_again = client.get('/items/list-items')
+            client.get(f'/items/get-item/{item.id}')
+            client.get(f'/items/get-item/{item.id}')
+            client.get(f'/items/{item.id}/public')
+            client.get(f'/items/{item.id}/public')
+
+        assert second.json() == first.json()
+        assert list_again.json() == list_response.json()
+        # Apenas a primeira leitura de cada chave vai ao banco
+        assert len(statements) == 3
+
+    def test_toggle_availability_invalidates_menu(self, client, admin_headers, create_test_item):
+        """Testar que alternar disponibilidade invalida o cardápio em cache"""
+        item = create_test_item()
+        assert len(client.get('/items/menu').json()) == 1
+        assert client.get(f'/items/{item.id}/public').status_code == status.HTTP_200_OK
+
+        client.put(f'/items/toggle-availability/{item.id}', headers=admin_headers)
+
+        assert client.get('/items/menu').json() == []
+        assert client.get(f'/items/{item.id}/public').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_admin_writes_invalidate_menu(self, client, admin_headers, create_test_item, sample_item_data):
+        """Testar que criar, editar e deletar itens invalidam o cardápio em cache"""
+        item = create_test_item()
+        assert [i['name'] for i in client.get('/items/list-items').json()] == [item.name]
+
+        client.post('/items/create-item', headers=admin_headers, json={**sample_item_data, 'name': 'Pizza Nova'})
+        assert {i['name'] for i in client.get('/items/list-items').json()} == {item.name, 'Pizza Nova'}
+
+        client.put(f'/items/edit-item/{item.id}', headers=admin_headers, json={'price': 31.5})
+        assert client.get(f'/items/get-item/{item.id}').json()['price'] == 31.5
+
+        client.delete(f'/items/delete-item/{item.id}', headers=admin_headers)
+        assert [i['name'] for i in client.get('/items/list-items').json()] == ['Pizza Nova']
+        assert client.get(f'/items/get-item/{item.id}').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.integration
+@pytest.mark.items
+class TestMenuEtag:
+    """Testes para ETag / If-None-Match no cardápio público"""
+
+    @pytest.mark.parametrize('path', ['/items/menu', '/items/list-items'])
+    def test_menu_not_modified_with_matching_etag(self, client, create_test_item, path):
+        """Testar que o cliente com a versão atual recebe 304 sem corpo"""
+        create_test_item()
+        response = client.get(path)
+        etag = response.headers['ETag']
+
+        cached_response = client.get(path, headers={'If-None-Match': etag})
+
+        assert cached_response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached_response.content == b''
+        assert cached_response.headers['ETag'] == etag
+
+    def test_menu_etag_differs_per_filter(self, client, create_test_item):
+        """Testar que filtros diferentes têm ETags diferentes"""
+        create_test_item()
+        all_items = client.get('/items/menu')
+        drinks = client.get('/items/menu', params={'category': 'bebida'})
+
+        assert all_items.headers['ETag'] != drinks.headers['ETag']
+        response = client.get(
+            '/items/menu', params={'category': 'bebida'}, headers={'If-None-Match': all_items.headers['ETag']}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_menu_etag_changes_after_admin_write(self, client, admin_headers, create_test_item):
+        """Testar que uma escrita do admin gera nova ETag e o cliente recebe o novo cardápio"""
+        item = create_test_item()
+        etag = client.get('/items/menu').headers['ETag']
+
+        client.put(f'/items/toggle-availability/{item.id}', headers=admin_headers)
+        response = client.get('/items/menu', headers={'If-None-Match': etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+        assert response.headers['ETag'] != etag
+
+    def test_menu_etag_survives_cache_refill(self, client, create_test_item):
+        """Testar que recarregar o cache (TTL ou outro worker) sem mudar o cardápio mantém a ETag"""
+        create_test_item()
+        etag = client.get('/items/menu').headers['ETag']
+
+        menu_cache.invalidate()
+        response = client.get('/items/menu', headers={'If-None-Match': etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers['ETag'] == etag
+
+
+@pytest.mark.integration
+@pytest.mark.items
+class TestPreSerializedMenu:
+    """Testes para o cardápio servido como bytes pré-serializados"""
+
+    def create_menu(self, create_test_item, count=8):
+        """Método auxiliar para criar um cardápio grande o bastante para gzip"""
+        return [
+            create_test_item(
+                {
+                    'name': f'Pizza Especial {i}',
+                    'description': 'Molho de tomate, mozzarella, manjericão e azeite',
+                    'price': 30.0 + i,
+                    'category': 'pizza',
+                    'is_available': True,
+                }
+            )
+            for i in range(count)
+        ]
+
+    def test_menu_served_gzipped_when_accepted(self, client, create_test_item):
+        """Testar que o cardápio vem comprimido quando o cliente aceita gzip"""
+        items = self.create_menu(create_test_item)
+
+        response = client.get('/items/menu', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers['content-encoding'] == 'gzip'
+        assert response.headers['vary'] == 'Accept-Encoding'
+        assert response.headers['content-type'] == 'application/json'
+        assert {i['name'] for i in response.json()} == {item.name for item in items}
+
+    def test_menu_served_plain_without_gzip(self, client, create_test_item):
+        """Testar que o cardápio vem sem compressão quando o cliente não aceita gzip"""
+        self.create_menu(create_test_item)
+
+        plain = client.get('/items/list-items', headers={'Accept-Encoding': 'identity'})
+        gzipped = client.get('/items/list-items', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'content-encoding' not in plain.headers
+        assert plain.json() == gzipped.json()
+        # Cada representação tem sua própria ETag forte
+        assert plain.headers['ETag'] != gzipped.headers['ETag']
+        revalidated = client.get(
+            '/items/list-items', headers={'Accept-Encoding': 'identity', 'If-None-Match': plain.headers['ETag']}
+        )
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_menu_payload_matches_item_schema(self, client, create_test_item):
+        """Testar que os bytes pré-serializados têm os mesmos campos do ItemResponse"""
+        item = create_test_item()
+
+        data = client.get('/items/menu').json()
+
+        assert data == [client.get(f'/items/get-item/{item.id}').json()]
+
+
 @pytest.mark.integration
 @pytest.mark.items
 class TestItemValidation:
@@ -0,0 +1,92 @@
+"""
+Testes de integração para endpoints de métricas
+"""
+import pytest
+from fastapi import status
+
+from src.config.database import get_pool_settings
+from src.utils.password_hashing import password_hashing_pool
+
+
+@pytest.mark.integration
+class TestDbPoolMetrics:
+    """Testes para a visão de estatísticas do pool de conexões"""
+
+    def test_db_pool_metrics_admin_success(self, client, admin_headers):
+        """Testar que admin consegue ver as estatísticas do pool"""
+        response = client.get('/metrics/db-pool', headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert 'pool_class' in data
+        assert data['settings']['pool_size'] == get_pool_settings()['pool_size']
+        assert 'pool_pre_ping' in data['settings']
+
+    def test_db_pool_metrics_regular_user_fails(self, client, user_headers):
+        """Testar que usuário comum não pode ver as estatísticas do pool"""
+        response = client.get('/metrics/db-pool', headers=user_headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_db_pool_metrics_unauthenticated_fails(self, client):
+        """Testar que acesso sem autenticação falha"""
+        response = client.get('/metrics/db-pool')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.integration
+class TestPasswordHashingMetrics:
+    """Testes para as métricas e a contrapressão do pool de hash de senhas"""
+
+    def test_password_hashing_metrics_admin_success(self, client, admin_headers):
+        """Testar que admin vê a ocupação do pool, incluindo o login que gerou o token"""
+        response = client.get('/metrics/password-hashing', headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['workers'] == password_hashing_pool.workers
+        assert data['in_flight'] == 0
+        assert data['completed'] >= 1
+
+    def test_password_hashing_metrics_regular_user_fails(self, client, user_headers):
+        """Testar que usuário comum não pode ver as métricas do pool"""
+        response = client.get('/metrics/password-hashing', headers=user_headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_login_returns_503_when_pool_saturated(self, client, create_test_user, monkeypatch):
+        """Testar que o login é recusado com 503 quando a fila do bcrypt está cheia"""
+        create_test_user()
+        rejected = password_hashing_pool.rejected
+        capacity = password_hashing_pool.workers + password_hashing_pool.max_queue
+        monkeypatch.setattr(password_hashing_pool, 'in_flight', capacity)
+
+        response = client.post('/auth/login', json={'email_or_username': 'testuser', 'password': 'TestPass123!'})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers['Retry-After'] == '1'
+        assert password_hashing_pool.rejected == rejected + 1
+
+
+@pytest.mark.unit
+class TestPoolSettings:
+    """Testes para leitura das configurações do pool pelo ambiente"""
+
+    def test_pool_settings_from_environment(self, monkeypatch):
+        """Testar que as variáveis de ambiente definem o pool"""
+        monkeypatch.setenv('DB_POOL_SIZE', '20')
+        monkeypatch.setenv('DB_MAX_OVERFLOW', '5')
+        monkeypatch.setenv('DB_POOL_TIMEOUT', '2.5')
+        monkeypatch.setenv('DB_POOL_RECYCLE', '600')
+        monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+
+        settings = get_pool_settings()
+
+        assert settings == {
+            'pool_size': 20,
+            'max_overflow': 5,
+            'pool_timeout': 2.5,
+            'pool_recycle': 600,
+            'pool_pre_ping': False,
+        }
@@ -2,11 +2,19 @@
 Testes de integração para gerenciamento de itens em pedidos
 """
 import json
+from decimal import Decimal
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
 
 from src.main import app
+from src.models import Order, OrderItem
+from src.routers.order_routes import increment_order_item
+from src.utils.money import to_money
+from src.utils.order_calculations import increment_order_totals
 
 client = TestClient(app)
 
@@ -285,3 +293,378 @@ class TestOrderItemManagement:
         )
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.integration
+@pytest.mark.orders
+class TestOrderTotalsEngine:
+    """Testes para a atualização incremental dos totais ao adicionar/remover itens"""
+
+    def add_item_statements(self, client, user_headers, order, item, count_queries):
+        """Adicionar duas unidades do item e devolver as instruções SQL executadas"""
+        with count_queries() as statements:
+            response = client.post(
+                f"/orders/{order['id']}/add-item", headers=user_headers, json={'item_id': item.id, 'quantity': 2}
+            )
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json(), statements
+
+    def test_add_item_cost_independent_of_order_size(
+        self, client, user_headers, create_items_with_preparation_times, create_pickup_order, count_queries
+    ):
+        """Testar que adicionar um item custa as mesmas instruções em pedidos pequenos e grandes"""
+        items = create_items_with_preparation_times([15] * 13)
+        small_order = create_pickup_order(user_headers, items[:2])
+        large_order = create_pickup_order(user_headers, items[:12])
+
+        _, small_statements = self.add_item_statements(client, user_headers, small_order, items[12], count_queries)
+        data, large_statements = self.add_item_statements(client, user_headers, large_order, items[12], count_queries)
+
+        assert len(large_statements) == len(small_statements)
+        assert not [s for s in large_statements if 'preparation_time' in s and 'IN (' in s]
+        expected_subtotal = sum(item.price for item in items[:12]) + items[12].price * 2
+        assert data['new_totals']['subtotal'] == pytest.approx(expected_subtotal)
+        assert data['new_totals']['total_amount'] == pytest.approx(expected_subtotal)
+
+    def test_add_slower_item_raises_estimated_time(
+        self, client, user_headers, create_items_with_preparation_times, create_pickup_order, count_queries
+    ):
+        """Testar que o tempo estimado passa a ser o do item mais demorado adicionado"""
+        fast, slow = create_items_with_preparation_times([10, 45])
+        order = create_pickup_order(user_headers, [fast])
+        assert order['estimated_delivery_time'] == 10
+
+        data, _ = self.add_item_statements(client, user_headers, order, slow, count_queries)
+
+        assert data['new_totals']['estimated_delivery_time'] == 45
+
+    def test_remove_slowest_item_recalculates_estimated_time(
+        self, client, user_headers, create_items_with_preparation_times, create_pickup_order
+    ):
+        """Testar que remover o item mais demorado recalcula o tempo com os itens restantes"""
+        items = create_items_with_preparation_times([10, 25, 45])
+        order = create_pickup_order(user_headers, items)
+        lines = {line['item_id']: line['id'] for line in order['items']}
+
+        response = client.delete(
+            f"/orders/{order['id']}/remove-item?order_item_id={lines[items[0].id]}", headers=user_headers
+        )
+        assert response.json()['new_totals']['estimated_delivery_time'] == 45
+
+        response = client.delete(
+            f"/orders/{order['id']}/remove-item?order_item_id={lines[items[2].id]}", headers=user_headers
+        )
+        data = response.json()
+        assert data['new_totals']['estimated_delivery_time'] == 25
+        assert data['new_totals']['subtotal'] == pytest.approx(items[1].price)
+        assert data['remaining_items_count'] == 1
+
+    def test_remove_item_single_transaction_and_aggregate(
+        self,
+        client,
+        user_headers,
+        create_items_with_preparation_times,
+        create_pickup_order,
+        test_async_engine,
+        count_queries,
+    ):
+        """Testar que a remoção faz um único commit e uma única agregação das linhas restantes"""
+        items = create_items_with_preparation_times([10, 25, 45])
+        order = create_pickup_order(user_headers, items)
+        lines = {line['item_id']: line['id'] for line in order['items']}
+
+        commits = []
+
+        def listener(conn):
+            commits.append(conn)
+
+        event.listen(test_async_engine.sync_engine, 'commit', listener)
+        try:
+            with count_queries() as statements:
+                response = client.delete(
+                    f"/orders/{order['id']}/remove-item?order_item_id={lines[items[2].id]}", headers=user_headers
+                )
+        finally:
+            event.remove(test_async_engine.sync_engine, 'commit', listener)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(commits) == 1
+        aggregates = [statement for statement in statements if 'count(' in statement.lower()]
+        assert len(aggregates) == 1
+        assert 'sum(' in aggregates[0].lower()
+
+    def test_remove_item_recomputes_subtotal_from_remaining_lines(
+        self, client, user_headers, create_items_with_preparation_times, create_pickup_order, test_db
+    ):
+        """Testar que o subtotal após a remoção é a soma das linhas restantes, mesmo se o guardado divergia"""
+        items = create_items_with_preparation_times([10, 25])
+        order = create_pickup_order(user_headers, items)
+        lines = {line['item_id']: line['id'] for line in order['items']}
+
+        stored_order = test_db.get(Order, order['id'])
+        stored_order.subtotal = Decimal('999.00')
+        test_db.commit()
+
+        response = client.delete(
+            f"/orders/{order['id']}/remove-item?order_item_id={lines[items[0].id]}", headers=user_headers
+        )
+
+        assert response.json()['new_totals']['subtotal'] == pytest.approx(items[1].price)
+        assert response.json()['new_totals']['total_amount'] == pytest.approx(items[1].price)
+
+
+@pytest.mark.integration
+@pytest.mark.orders
+class TestAtomicCartUpdates:
+    """Testes para os incrementos atômicos das linhas e a versão dos pedidos"""
+
+    def test_repeated_add_item_accumulates_quantity_and_version(self, client, user_headers, setup_order_with_items):
+        """Testar que adições repetidas somam a quantidade da mesma linha e incrementam a versão"""
+        order = setup_order_with_items(user_headers)
+        line = order['items'][0]
+        url = f"/orders/{order['id']}/add-item"
+
+        first = client.post(url, headers=user_headers, json={'item_id': line['item_id'], 'quantity': 1}).json()
+        second = client.post(url, headers=user_headers, json={'item_id': line['item_id'], 'quantity': 2}).json()
+
+        assert second['item_added']['id'] == line['id']
+        assert second['item_added']['quantity'] == line['quantity'] + 3
+        assert second['item_added']['total_price'] == pytest.approx(line['unit_price'] * (line['quantity'] + 3))
+        assert second['version'] == first['version'] + 1
+        assert second['new_totals']['subtotal'] == pytest.approx(order['subtotal'] + line['unit_price'] * 3)
+
+    async def test_interleaved_increments_keep_both_changes(
+        self, async_session_factory, user_headers, setup_order_with_items
+    ):
+        """Testar que duas sessões que leram o mesmo pedido não sobrescrevem os incrementos uma da outra"""
+        order = setup_order_with_items(user_headers)
+        line = order['items'][0]
+
+        async with async_session_factory() as first, async_session_factory() as second:
+            first_order = await first.get(Order, order['id'])
+            second_order = await second.get(Order, order['id'])
+
+            for session, snapshot, quantity in ((first, first_order, 1), (second, second_order, 2)):
+                assert await increment_order_item(session, order['id'], line['item_id'], quantity)
+                assert await increment_order_totals(session, snapshot, to_money(line['unit_price']) * quantity)
+                await session.commit()
+
+        async with async_session_factory() as session:
+            stored_order = await session.get(Order, order['id'])
+            stored_line = await session.get(OrderItem, line['id'])
+
+        assert stored_line.quantity == line['quantity'] + 3
+        assert stored_order.subtotal == to_money(order['subtotal']) + to_money(line['unit_price']) * 3
+        assert stored_order.version == second_order.version == first_order.version + 1
+
+    async def test_stale_order_write_is_rejected(self, async_session_factory, user_headers, setup_order_with_items):
+        """Testar que gravar um pedido lido antes de outra alteração falha em vez de sobrescrevê-la"""
+        order = setup_order_with_items(user_headers)
+
+        async with async_session_factory() as stale, async_session_factory() as other:
+            stale_order = await stale.get(Order, order['id'])
+            other_order = await other.get(Order, order['id'])
+            assert await increment_order_totals(other, other_order, Decimal('10.00'))
+            await other.commit()
+
+            stale_order.status = 'confirmado'
+            with pytest.raises(StaleDataError):
+                await stale.commit()
+
+    async def test_increment_rejected_for_locked_order(
+        self, async_session_factory, user_headers, setup_order_with_items
+    ):
+        """Testar que o incremento não altera um pedido que deixou de aceitar modificações"""
+        order = setup_order_with_items(user_headers)
+
+        async with async_session_factory() as session:
+            stored_order = await session.get(Order, order['id'])
+            stored_order.status = 'cancelado'
+            await session.commit()
+
+            assert not await increment_order_totals(session, stored_order, Decimal('10.00'))
+            await session.commit()
+            assert stored_order.subtotal == to_money(order['subtotal'])
+
+
+@pytest.mark.integration
+@pytest.mark.orders
+class TestOrderItemsBatch:
+    """Testes para a alteração em lote dos itens de um pedido (PATCH /orders/{id}/items)"""
+
+    def count_selects(self, statements):
+        """Quantidade de consultas de leitura entre as instruções executadas"""
+        return len([statement for statement in statements if statement.lstrip().upper().startswith('SELECT')])
+
+    def set_quantity(self, client, user_headers, order, line, quantity):
+        """Alterar a quantidade de uma linha pelo endpoint em lote"""
+        return client.patch(
+            f"/orders/{order['id']}/items",
+            headers=user_headers,
+            json={'operations': [{'op': 'set_quantity', 'order_item_id': line['id'], 'quantity': quantity}]},
+        )
+
+    def test_batch_applies_all_operations(
+        self, client, user_headers, create_items_with_preparation_times, create_pickup_order
+    ):
+        """Testar que add, set_quantity e remove são aplicados juntos com os totais recalculados"""
+        first, second, third = create_items_with_preparation_times([10, 45, 25])
+        order = create_pickup_order(user_headers, [first, second])
+        lines = {line['item_id']: line['id'] for line in order['items']}
+
+        response = client.patch(
+            f"/orders/{order['id']}/items",
+            headers=user_headers,
+            json={
+                'operations': [
+                    {'op': 'add', 'item_id': third.id, 'quantity': 2, 'observations': 'Sem cebola'},
+                    {'op': 'set_quantity', 'order_item_id': lines[first.id], 'quantity': 3},
+                    {'op': 'remove', 'order_item_id': lines[second.id]},
+                ]
+            },
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        quantities = {line['item_id']: line['quantity'] for line in data['items']}
+        assert quantities == {first.id: 3, third.id: 2}
+        assert data['new_totals']['subtotal'] == pytest.approx(first.price * 3 + third.price * 2)
+        assert data['new_totals']['estimated_delivery_time'] == 25
+
+        stored = client.get(f"/orders/{order['id']}", headers=user_headers).json()
+        assert float(stored['subtotal']) == pytest.approx(data['new_totals']['subtotal'])
+        assert {line['item_id']: line['quantity'] for line in stored['items']} == quantities
+
+    def test_batch_cost_independent_of_operation_count(
+        self, client, user_headers, create_items_with_preparation_times, create_pickup_order, count_queries
+    ):
+        """Testar que as consultas de leitura não crescem com o número de operações do lote"""
+        items = create_items_with_preparation_times([15] * 6)
+        order = create_pickup_order(user_headers, items[:3])
+        url = f"/orders/{order['id']}/items"
+
+        with count_queries() as single:
+            client.patch(
+                url, headers=user_headers, json={'operations': [{'op': 'add', 'item_id': items[3].id, 'quantity': 1}]}
+            )
+        with count_queries() as many:
+            response = client.patch(
+                url,
+                headers=user_headers,
+                json={
+                    'operations': [
+                        {'op': 'add', 'item_id': items[4].id, 'quantity': 1},
+                        {'op': 'add', 'item_id': items[5].id, 'quantity': 1},
+                        *[
+                            {'op': 'set_quantity', 'order_item_id': line['id'], 'quantity': 2}
+                            for line in order['items']
+                        ],
+                    ]
+                },
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert self.count_selects(many) == self.count_selects(single)
+
+    def test_batch_is_all_or_nothing(self, client, user_headers, setup_order_with_items):
+        """Testar que uma operação inválida desfaz as demais operações do lote"""
+        order = setup_order_with_items(user_headers)
+        line = order['items'][0]
+
+        response = client.patch(
+            f"/orders/{order['id']}/items",
+            headers=user_headers,
+            json={
+                'operations': [
+                    {'op': 'set_quantity', 'order_item_id': line['id'], 'quantity': 5},
+                    {'op': 'remove', 'order_item_id': 999999},
+                ]
+            },
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        stored = client.get(f"/orders/{order['id']}", headers=user_headers).json()
+        assert stored['items'][0]['quantity'] == line['quantity']
+        assert float(stored['subtotal']) == pytest.approx(order['subtotal'])
+
+    def test_batch_removing_all_items_cancels_order(self, client, user_headers, setup_order_with_items):
+        """Testar que o pedido é cancelado quando o lote remove todos os itens"""
+        order = setup_order_with_items(user_headers)
+
+        response = client.patch(
+            f"/orders/{order['id']}/items",
+            headers=user_headers,
+            json={'operations': [{'op': 'remove', 'order_item_id': line['id']} for line in order['items']]},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['order_status'] == 'cancelado'
+        assert data['items'] == []
+        assert data['new_totals']['subtotal'] == 0.0
+
+    def test_batch_with_stale_version_conflicts(self, client, user_headers, setup_order_with_items):
+        """Testar que um lote baseado em uma versão antiga do pedido é recusado sem alterações"""
+        order = setup_order_with_items(user_headers)
+        line = order['items'][0]
+
+        version = self.set_quantity(client, user_headers, order, line, 3).json()['version']
+        assert self.set_quantity(client, user_headers, order, line, 4).json()['version'] == version + 1
+
+        response = client.patch(
+            f"/orders/{order['id']}/items",
+            headers=user_headers,
+            json={'operations': [{'op': 'remove', 'order_item_id': line['id']}], 'version': version},
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert client.get(f"/orders/{order['id']}", headers=user_headers).json()['items'][0]['quantity'] == 4
+
+    def test_batch_without_net_change_still_bumps_version(self, client, user_headers, setup_order_with_items):
+        """Testar que um lote aplicado gera exatamente uma nova versão, mesmo sem alterar valores"""
+        order = setup_order_with_items(user_headers)
+        line = order['items'][0]
+
+        version = self.set_quantity(client, user_headers, order, line, line['quantity']).json()['version']
+        response = self.set_quantity(client, user_headers, order, line, line['quantity'])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['version'] == version + 1
+
+    def test_batch_operation_requires_target(self, client, user_headers, setup_order_with_items):
+        """Testar que operações sem o item alvo ou sem quantidade são rejeitadas na validação"""
+        order = setup_order_with_items(user_headers)
+        url = f"/orders/{order['id']}/items"
+
+        for operation in ({'op': 'remove'}, {'op': 'add', 'quantity': 1}, {'op': 'set_quantity', 'order_item_id': 1}):
+            response = client.patch(url, headers=user_headers, json={'operations': [operation]})
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        response = client.patch(url, headers=user_headers, json={'operations': []})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_batch_on_other_user_order_fails(self, client, auth_headers, setup_order_with_items):
+        """Testar que não é possível alterar os itens do pedido de outro usuário"""
+        order = setup_order_with_items(auth_headers())
+        line = order['items'][0]
+
+        response = client.patch(
+            f"/orders/{order['id']}/items",
+            headers=auth_headers(),
+            json={'operations': [{'op': 'remove', 'order_item_id': line['id']}]},
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_batch_on_delivered_order_fails(self, client, user_headers, setup_delivered_order):
+        """Testar que não é possível alterar os itens de um pedido entregue"""
+        order = setup_delivered_order(user_headers)
+        line = order['items'][0]
+
+        response = client.patch(
+            f"/orders/{order['id']}/items",
+            headers=user_headers,
+            json={'operations': [{'op': 'set_quantity', 'order_item_id': line['id'], 'quantity': 2}]},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -1,8 +1,13 @@
 """
 Testes de integração para endpoints de pedidos
 """
+from datetime import date, datetime
+
 import pytest
 from fastapi import status
+from sqlalchemy import update
+
+from src.models import Order, OrderDailyStats
 
 
 @pytest.mark.integration
@@ -39,7 +44,63 @@ class TestOrderCreation:
         assert len(data['items']) == 2
         # Verificar cálculo do total
         expected_total = (item1.price * 2) + (item2.price * 1)
-        assert abs(data['total_amount'] - expected_total) < 0.01
+        assert data['total_amount'] == float(expected_total)
+
+    def test_create_order_response_built_without_reloading(
+        self, client, user_headers, create_test_item, sample_order_data, count_queries
+    ):
+        """Testar que a resposta da criação não recarrega pedido, linhas ou itens do banco"""
+        items = [
+            create_test_item({'name': f'Pizza {i}', 'price': 30.0 + i, 'category': 'pizza', 'is_available': True})
+            for i in range(3)
+        ]
+        order_data = sample_order_data.copy()
+        order_data['items'] = [{'item_id': item.id, 'quantity': 1} for item in items]
+
+        with count_queries() as statements:
+            response = client.post('/orders/create-order', headers=user_headers, json=order_data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        # Apenas os itens do cardápio são lidos (o usuário vem do token); nenhum UPDATE ou refresh após o INSERT
+        assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 1
+        assert not [s for s in statements if s.lstrip().upper().startswith('UPDATE')]
+        assert data['estimated_delivery_time'] == 20
+
+        # Os ids devolvidos são os mesmos persistidos
+        stored = client.get(f"/orders/{data['id']}", headers=user_headers).json()
+        assert sorted(i['id'] for i in stored['items']) == sorted(i['id'] for i in data['items'])
+        assert {i['item']['name'] for i in data['items']} == {item.name for item in items}
+
+    def test_create_large_order_inserts_lines_in_one_statement(
+        self, client, user_headers, create_test_item, sample_order_data, count_queries
+    ):
+        """Testar que um pedido grande insere todas as linhas com um único INSERT"""
+        items = [
+            create_test_item({'name': f'Item Buffet {i}', 'price': 10.0, 'category': 'entrada', 'is_available': True})
+            for i in range(25)
+        ]
+        order_data = sample_order_data.copy()
+        order_data['items'] = [
+            {'item_id': item.id, 'quantity': 2, 'observations': 'sem sal' if i % 2 else None}
+            for i, item in enumerate(items)
+        ]
+
+        with count_queries() as statements:
+            response = client.post('/orders/create-order', headers=user_headers, json=order_data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert len(data['items']) == 25
+        assert len({i['id'] for i in data['items']}) == 25
+        assert len([s for s in statements if 'INSERT INTO order_items' in s]) == 1
+        # Itens do cardápio, pedido, linhas e consolidado diário (o usuário vem do token)
+        assert len(statements) == 4
+
+        stored = client.get(f"/orders/{data['id']}", headers=user_headers).json()
+        stored_notes = {i['id']: i['observations'] for i in stored['items']}
+        for line in data['items']:
+            assert stored_notes[line['id']] == (line['observations'] or '')
 
     def test_create_order_unauthenticated_fails(self, client, create_test_item, sample_order_data):
         """Testar que criação de pedido sem autenticação falha"""
@@ -202,6 +263,39 @@ class TestOrderRetrieval:
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_get_order_by_id_admin_success(self, client, admin_headers, user_headers, create_test_item):
+        """Testar que admin pode ver pedido de outro usuário"""
+        order = self.setup_order_with_items(client, user_headers, create_test_item)
+
+        response = client.get(f"/orders/{order['id']}", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['id'] == order['id']
+
+    def test_get_order_by_id_constant_queries(self, client, user_headers, create_test_item, count_queries):
+        """Testar que o pedido é carregado sem uma consulta por item (sem N+1)"""
+        items = [
+            create_test_item({'name': f'Pizza {i}', 'price': 20.0 + i, 'category': 'pizza', 'is_available': True})
+            for i in range(5)
+        ]
+        order_data = {
+            'customer_name': 'João Silva',
+            'customer_phone': '(11) 99999-9999',
+            'is_delivery': False,
+            'payment_method': 'pix',
+            'items': [{'item_id': item.id, 'quantity': 1} for item in items],
+        }
+        order = client.post('/orders/create-order', headers=user_headers, json=order_data).json()
+
+        with count_queries() as statements:
+            response = client.get(f"/orders/{order['id']}", headers=user_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data['items']) == 5
+        assert {i['item']['name'] for i in data['items']} == {item.name for item in items}
+        assert len(statements) <= 2
+
     def test_get_order_nonexistent_fails(self, client, user_headers):
         """Testar obtenção de pedido inexistente"""
         response = client.get('/orders/999', headers=user_headers)
@@ -209,6 +303,114 @@ class TestOrderRetrieval:
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@pytest.mark.integration
+@pytest.mark.orders
+class TestOrderSummaries:
+    """Testes para a contagem de itens nos resumos de pedidos"""
+
+    def test_my_orders_report_items_count(self, client, user_headers, create_test_item, create_pickup_order):
+        """Testar que a listagem do usuário informa a quantidade real de linhas"""
+        items = [
+            create_test_item({'name': f'Pizza {i}', 'price': 30.0, 'category': 'pizza', 'is_available': True})
+            for i in range(3)
+        ]
+        big_order = create_pickup_order(user_headers, items, quantity=2)['id']
+        small_order = create_pickup_order(user_headers, items[:1], quantity=2)['id']
+
+        data = client.get('/orders/my-orders', headers=user_headers).json()
+
+        counts = {o['id']: o['items_count'] for o in data}
+        assert counts == {big_order: 3, small_order: 1}
+
+    def test_admin_orders_constant_queries(
+        self, client, admin_headers, user_headers, create_test_item, create_pickup_order, count_queries
+    ):
+        """Testar que a listagem do admin conta as linhas sem uma consulta por pedido (sem N+1)"""
+        items = [
+            create_test_item({'name': f'Pizza {i}', 'price': 30.0, 'category': 'pizza', 'is_available': True})
+            for i in range(2)
+        ]
+        for _ in range(6):
+            create_pickup_order(user_headers, items, quantity=2)
+
+        with count_queries() as statements:
+            response = client.get('/orders/admin/all-orders', headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data) == 6
+        assert all(o['items_count'] == 2 for o in data)
+        # Página de pedidos + contagem agrupada (a permissão de admin vem do token)
+        assert len(statements) == 2
+
+
+@pytest.mark.integration
+@pytest.mark.orders
+class TestOrderCursorPagination:
+    """Testes para a paginação por cursor das listagens de pedidos"""
+
+    def create_orders(self, client, user_headers, create_test_item, test_db, count=5):
+        """Método auxiliar para criar pedidos com o mesmo created_at (empate resolvido pelo id)"""
+        item = create_test_item()
+        order_data = {
+            'customer_name': 'João Silva',
+            'customer_phone': '(11) 99999-9999',
+            'payment_method': 'pix',
+            'items': [{'item_id': item.id, 'quantity': 1}],
+        }
+        ids = [
+            client.post('/orders/create-order', headers=user_headers, json=order_data).json()['id']
+            for _ in range(count)
+        ]
+
+        test_db.execute(update(Order).values(created_at=datetime(2024, 1, 1, 12, 0)))
+        test_db.commit()
+        return ids
+
+    def fetch_all_pages(self, client, url, headers, limit):
+        """Método auxiliar para percorrer todas as páginas seguindo X-Next-Cursor"""
+        pages = []
+        cursor = None
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            response = client.get(url, headers=headers, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            pages.append([o['id'] for o in response.json()])
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return pages
+
+    def test_my_orders_pages_through_all_orders(self, client, user_headers, create_test_item, test_db):
+        """Testar que as páginas cobrem todos os pedidos, sem repetição, do mais recente ao mais antigo"""
+        ids = self.create_orders(client, user_headers, create_test_item, test_db)
+
+        pages = self.fetch_all_pages(client, '/orders/my-orders', user_headers, limit=2)
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [order_id for page in pages for order_id in page] == sorted(ids, reverse=True)
+
+    def test_admin_orders_pages_through_all_orders(
+        self, client, admin_headers, user_headers, create_test_item, test_db
+    ):
+        """Testar paginação por cursor na listagem do administrador"""
+        ids = self.create_orders(client, user_headers, create_test_item, test_db, count=4)
+
+        pages = self.fetch_all_pages(client, '/orders/admin/all-orders', admin_headers, limit=2)
+
+        # Página exatamente cheia no final não gera cursor para uma página vazia
+        assert [len(page) for page in pages] == [2, 2]
+        assert [order_id for page in pages for order_id in page] == sorted(ids, reverse=True)
+
+    def test_invalid_cursor_returns_400(self, client, user_headers):
+        """Testar que um cursor inválido é rejeitado"""
+        response = client.get('/orders/my-orders', headers=user_headers, params={'cursor': 'nao-e-um-cursor'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Cursor' in response.json()['detail']
+
+
 @pytest.mark.integration
 @pytest.mark.orders
 class TestOrderStatusUpdate:
@@ -391,6 +593,92 @@ class TestAdminOrderEndpoints:
         assert 'average_ticket' in data
         assert 'orders_by_status' in data
 
+    def test_get_order_statistics_from_daily_rollup(
+        self, client, admin_headers, user_headers, create_test_item, test_db, count_queries
+    ):
+        """Testar que as estatísticas vêm do consolidado diário, mantido pelas rotas de pedidos"""
+        item = create_test_item({'name': 'Pizza Stats', 'price': 50.0, 'category': 'pizza', 'is_available': True})
+        order_data = {
+            'customer_name': 'João Silva',
+            'customer_phone': '(11) 99999-9999',
+            'payment_method': 'pix',
+            'is_delivery': False,
+            'items': [{'item_id': item.id, 'quantity': 1}],
+        }
+        ids = [
+            client.post('/orders/create-order', headers=user_headers, json=order_data).json()['id'] for _ in range(3)
+        ]
+        client.patch(f'/orders/{ids[0]}/status', headers=admin_headers, params={'new_status': 'entregue'})
+        client.delete(f'/orders/{ids[1]}/cancel', headers=user_headers)
+
+        # Dia antigo já consolidado
+        test_db.add(OrderDailyStats(day=date(2020, 1, 1), status='entregue', orders_count=2, revenue=70.0))
+        test_db.commit()
+
+        with count_queries() as statements:
+            response = client.get('/orders/admin/stats', headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['total_orders'] == 5
+        assert data['orders_today'] == 3
+        assert data['total_revenue'] == 170.0
+        assert abs(data['average_ticket'] - 170.0 / 3) < 0.01
+        assert data['orders_by_status'] == [
+            {'status': 'pendente', 'count': 1},
+            {'status': 'entregue', 'count': 3},
+            {'status': 'cancelado', 'count': 1},
+        ]
+        # Admin já em cache (alterou o status acima): só a consulta ao consolidado, sem ler pedidos
+        assert len(statements) == 1
+        assert 'FROM orders' not in statements[-1]
+
+    def test_daily_rollup_matches_orders(self, client, admin_headers, user_headers, create_test_item, test_db):
+        """Testar que o consolidado acompanha criação, itens, status e cancelamento dos pedidos"""
+        pizza = create_test_item({'name': 'Pizza Roll', 'price': 40.0, 'category': 'pizza', 'is_available': True})
+        drink = create_test_item({'name': 'Suco Roll', 'price': 8.5, 'category': 'bebida', 'is_available': True})
+        order_data = {
+            'customer_name': 'João Silva',
+            'customer_phone': '(11) 99999-9999',
+            'payment_method': 'pix',
+            'items': [{'item_id': pizza.id, 'quantity': 1}],
+        }
+        ids = [
+            client.post('/orders/create-order', headers=user_headers, json=order_data).json()['id'] for _ in range(4)
+        ]
+
+        client.post(f'/orders/{ids[0]}/add-item', headers=user_headers, json={'item_id': drink.id, 'quantity': 2})
+        added = client.post(
+            f'/orders/{ids[1]}/add-item', headers=user_headers, json={'item_id': drink.id, 'quantity': 1}
+        )
+        client.delete(
+            f'/orders/{ids[1]}/remove-item',
+            headers=user_headers,
+            params={'order_item_id': added.json()['item_added']['id']},
+        )
+        line = client.get(f'/orders/{ids[2]}', headers=user_headers).json()['items'][0]
+        client.delete(f'/orders/{ids[2]}/remove-item', headers=user_headers, params={'order_item_id': line['id']})
+        client.patch(f'/orders/{ids[3]}/status', headers=admin_headers, params={'new_status': 'preparando'})
+        client.delete(f'/orders/{ids[0]}/cancel', headers=user_headers)
+
+        test_db.expire_all()
+        expected = {}
+        for order in test_db.query(Order).all():
+            key = (order.created_at.date(), order.status.code)
+            count, revenue = expected.get(key, (0, 0))
+            expected[key] = (count + 1, revenue + order.total_amount)
+
+        rollup = {
+            (row.day, row.status): (row.orders_count, row.revenue)
+            for row in test_db.query(OrderDailyStats).all()
+            if row.orders_count
+        }
+        assert {status_code for _, status_code in expected} == {'pendente', 'preparando', 'cancelado'}
+        assert rollup.keys() == expected.keys()
+        for key, (count, revenue) in expected.items():
+            assert rollup[key][0] == count
+            assert rollup[key][1] == revenue
+
     def test_get_order_statistics_regular_user_fails(self, client, user_headers):
         """Testar que usuário comum não pode ver estatísticas"""
         response = client.get('/orders/admin/stats', headers=user_headers)
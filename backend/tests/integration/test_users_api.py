@@ -1,8 +1,15 @@
 """
 Testes de integração para endpoints de usuários
 """
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi import status
+from jose import jwt
+
+from src.config.security import ALGORITHM, SECRET_KEY, decode_access_token
+from src.models import User
+from src.utils.token_revocation import token_revocations
 
 
 @pytest.mark.integration
@@ -173,6 +180,31 @@ class TestAdminUserEndpoints:
         data = response.json()
         assert len(data) == 2
 
+    def test_list_users_with_cursor(self, client, admin_headers, create_test_user):
+        """Testar que o cursor percorre todos os usuários sem repetição"""
+        for i in range(4):
+            create_test_user(
+                {
+                    'username': f'cursor_user{i}',
+                    'email': f'cursor_user{i}@example.com',
+                    'password': 'TestPass123!',
+                }
+            )
+        total = len(client.get('/users/list', headers=admin_headers).json())
+
+        seen = []
+        params = {'limit': 2}
+        while True:
+            response = client.get('/users/list', headers=admin_headers, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(user['id'] for user in response.json())
+            if 'X-Next-Cursor' not in response.headers:
+                break
+            params['cursor'] = response.headers['X-Next-Cursor']
+
+        assert len(seen) == total
+        assert len(set(seen)) == total
+
     def test_get_user_by_id_admin_success(self, client, admin_headers, create_test_user):
         """Testar obtenção de usuário específico por administrador"""
         # Criar usuário
@@ -333,6 +365,100 @@ class TestAdminUserManagement:
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
+@pytest.mark.integration
+@pytest.mark.users
+class TestCurrentUserCache:
+    """Testes para o carregamento do usuário autenticado com cache"""
+
+    def legacy_headers(self, headers):
+        """Headers com um token no formato antigo (apenas sub), sem as claims de permissão"""
+        claims = decode_access_token(headers['Authorization'].split()[1])
+        token = jwt.encode(
+            {'sub': str(claims.user_id), 'exp': datetime.utcnow() + timedelta(minutes=5), 'type': 'access'},
+            SECRET_KEY,
+            algorithm=ALGORITHM,
+        )
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_admin_claim_skips_user_lookup(self, client, admin_headers, count_queries):
+        """Testar que a claim de admin do token dispensa a consulta do usuário"""
+        with count_queries() as statements:
+            response = client.get('/users/list', headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not [s for s in statements if 'WHERE users.id' in s]
+
+    def test_legacy_token_loaded_once_and_reused(self, client, admin_headers, count_queries):
+        """Testar que tokens sem claims consultam o usuário uma vez e o reaproveitam do cache"""
+        headers = self.legacy_headers(admin_headers)
+
+        with count_queries() as statements:
+            client.get('/users/list', headers=headers)
+        assert len([s for s in statements if 'WHERE users.id' in s]) == 1
+
+        with count_queries() as statements:
+            response = client.get('/users/list', headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert not [s for s in statements if 'WHERE users.id' in s]
+
+    def test_legacy_token_regular_user_fails(self, client, user_headers):
+        """Testar que tokens sem claims continuam sujeitos à verificação de admin"""
+        response = client.get('/users/list', headers=self.legacy_headers(user_headers))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_demoted_admin_loses_access_immediately(self, client, admin_headers, auth_headers, test_db):
+        """Testar que remover o status de admin invalida o usuário em cache"""
+        other_admin_headers = auth_headers(is_admin=True)
+        assert client.get('/users/list', headers=other_admin_headers).status_code == status.HTTP_200_OK
+        other_admin_id = client.get('/users/me', headers=other_admin_headers).json()['id']
+
+        response = client.patch(f'/users/{other_admin_id}/admin?is_admin=false', headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.get('/users/list', headers=other_admin_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_promoted_user_gains_access_immediately(self, client, admin_headers, user_headers):
+        """Testar que promover a admin revoga o token antigo (sem a claim) e libera o acesso"""
+        user_id = client.get('/users/me', headers=user_headers).json()['id']
+        assert client.get('/users/list', headers=user_headers).status_code == status.HTTP_403_FORBIDDEN
+
+        response = client.patch(f'/users/{user_id}/admin?is_admin=true', headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        assert client.get('/users/list', headers=user_headers).status_code == status.HTTP_200_OK
+
+    def test_username_change_revokes_claims(self, client, user_headers, create_test_item, sample_order_data):
+        """Testar que trocar o username invalida o username das claims do token antigo"""
+        item = create_test_item()
+        response = client.put('/users/me', headers=user_headers, json={'username': 'username_renomeado'})
+        assert response.status_code == status.HTTP_200_OK
+
+        order_data = {**sample_order_data, 'items': [{'item_id': item.id, 'quantity': 1}]}
+        del order_data['customer_name']
+        response = client.post('/orders/create-order', headers=user_headers, json=order_data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()['customer_name'] == 'username_renomeado'
+
+    def test_revocation_seen_by_other_workers(self, client, admin_headers, auth_headers, test_db):
+        """Testar que a revogação feita em outro worker é lida do banco na sincronização seguinte"""
+        other_admin_headers = auth_headers(is_admin=True)
+        other_admin_id = client.get('/users/me', headers=other_admin_headers).json()['id']
+
+        # Simular outro worker: a alteração chega só ao banco
+        user = test_db.get(User, other_admin_id)
+        user.is_admin = False
+        user.security_version += 1
+        test_db.commit()
+        assert client.get('/users/list', headers=other_admin_headers).status_code == status.HTTP_200_OK
+
+        token_revocations._next_refresh = 0.0
+        response = client.get('/users/list', headers=other_admin_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
 @pytest.mark.integration
 @pytest.mark.users
 class TestUserStatistics:
@@ -382,6 +508,59 @@ class TestUserStatistics:
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_user_statistics_single_query_and_cache(self, client, admin_headers, count_queries):
+        """Testar que as estatísticas custam uma consulta e são reaproveitadas do cache"""
+        with count_queries() as statements:
+            first = client.get('/users/admin/stats', headers=admin_headers)
+        assert first.status_code == status.HTTP_200_OK
+        assert len(statements) == 1
+
+        with count_queries() as statements:
+            second = client.get('/users/admin/stats', headers=admin_headers)
+        assert second.json() == first.json()
+        # A permissão de admin vem do token, então o cache dispensa qualquer consulta
+        assert not statements
+
+    def test_user_statistics_cache_still_checks_admin(self, client, admin_headers, user_headers):
+        """Testar que o cache não dispensa a verificação de permissão"""
+        client.get('/users/admin/stats', headers=admin_headers)
+
+        response = client.get('/users/admin/stats', headers=user_headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_user_statistics_invalidated_by_changes(self, client, admin_headers, create_test_user):
+        """Testar que cadastro e alterações de admin/ativo invalidam o cache"""
+        user = create_test_user(
+            {
+                'username': 'stats_cache_user',
+                'email': 'stats_cache_user@example.com',
+                'password': 'TestPass123!',
+            }
+        )
+        before = client.get('/users/admin/stats', headers=admin_headers).json()
+
+        client.patch(f'/users/{user.id}/admin?is_admin=true', headers=admin_headers)
+        after_admin = client.get('/users/admin/stats', headers=admin_headers).json()
+        assert after_admin['admin_users'] == before['admin_users'] + 1
+
+        client.patch(f'/users/{user.id}/active?is_active=false', headers=admin_headers)
+        after_active = client.get('/users/admin/stats', headers=admin_headers).json()
+        assert after_active['inactive_users'] == before['inactive_users'] + 1
+
+        register = client.post(
+            '/auth/register',
+            json={
+                'username': 'stats_new_user',
+                'email': 'stats_new_user@example.com',
+                'password': 'TestPass123!',
+                'confirm_password': 'TestPass123!',
+            },
+        )
+        assert register.status_code == status.HTTP_200_OK
+        after_register = client.get('/users/admin/stats', headers=admin_headers).json()
+        assert after_register['total_users'] == before['total_users'] + 1
+
 
 @pytest.mark.integration
 @pytest.mark.users
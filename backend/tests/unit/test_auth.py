@@ -8,6 +8,7 @@ from pathlib import Path
 import pytest
 from fastapi import HTTPException
 from jose import JWTError, jwt
+from sqlalchemy import update
 
 # Adicionar o diretório backend ao sys.path se necessário
 backend_dir = Path(__file__).parent.parent.parent
@@ -16,14 +17,19 @@ if str(backend_dir) not in sys.path:
 
 from src.config.security import (
     ALGORITHM,
+    BCRYPT_ROUNDS,
     SECRET_KEY,
+    decode_access_token,
     hash_password,
+    load_current_user,
+    password_needs_rehash,
     verify_admin_access,
     verify_password,
     verify_refresh_token,
     verify_token,
 )
 from src.models import User
+from src.utils.user_cache import current_user_cache
 
 
 @pytest.mark.unit
@@ -47,6 +53,21 @@ class TestPasswordHashing:
 
         assert not verify_password(wrong_password, hashed)
 
+    def test_hash_uses_configured_cost(self):
+        """Testar que o hash usa o custo configurado em BCRYPT_ROUNDS"""
+        hashed = hash_password('testpassword123')
+
+        assert hashed.split('$')[2] == f'{BCRYPT_ROUNDS:02d}'
+        assert not password_needs_rehash(hashed)
+
+    def test_needs_rehash_for_other_cost(self):
+        """Testar que hashes com outro custo (ou inválidos) precisam ser refeitos"""
+        hashed = hash_password('testpassword123', rounds=BCRYPT_ROUNDS + 1)
+
+        assert password_needs_rehash(hashed)
+        assert not password_needs_rehash(hashed, rounds=BCRYPT_ROUNDS + 1)
+        assert password_needs_rehash('hash-invalido')
+
 
 @pytest.mark.unit
 @pytest.mark.auth
@@ -153,45 +174,95 @@ class TestTokenVerification:
 
         assert exc_info.value.status_code == 401
 
+    def test_decode_access_token_claims(self):
+        """Testar que as claims de permissão e versão de segurança são lidas do token"""
+        token_data = {
+            'sub': '7',
+            'type': 'access',
+            'exp': datetime.utcnow() + timedelta(minutes=30),
+            'usr': 'admin',
+            'adm': True,
+            'act': True,
+            'sv': 3,
+        }
+        token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+
+        claims = decode_access_token(token)
+
+        assert claims == (7, 'admin', True, True, 3)
+
+    def test_decode_legacy_token_has_no_claims(self):
+        """Testar que tokens antigos (apenas sub) não trazem permissões"""
+        token_data = {'sub': '7', 'type': 'access', 'exp': datetime.utcnow() + timedelta(minutes=30)}
+        token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+
+        claims = decode_access_token(token)
+
+        assert claims.user_id == 7
+        assert claims.is_admin is None
+        assert claims.security_version is None
+
 
 @pytest.mark.unit
 @pytest.mark.auth
 class TestAdminVerification:
     """Testes para verificação de permissões de admin"""
 
-    def test_verify_admin_access_success(self, test_db, create_test_user):
+    async def test_verify_admin_access_success(self, async_test_db, create_test_user):
         """Testar verificação bem-sucedida de admin"""
         # Criar usuário admin
         admin_user = create_test_user(is_admin=True)
 
         # Verificar acesso admin
-        result = verify_admin_access(admin_user.id, test_db)
+        result = await verify_admin_access(admin_user.id, async_test_db)
 
         assert result.id == admin_user.id
         assert result.is_admin is True
 
-    def test_verify_admin_access_fails_for_regular_user(self, test_db, create_test_user):
+    async def test_verify_admin_access_fails_for_regular_user(self, async_test_db, create_test_user):
         """Testar que usuário comum falha na verificação de admin"""
         # Criar usuário comum
         regular_user = create_test_user(is_admin=False)
 
         # Verificar que falha
         with pytest.raises(HTTPException) as exc_info:
-            verify_admin_access(regular_user.id, test_db)
+            await verify_admin_access(regular_user.id, async_test_db)
 
         assert exc_info.value.status_code == 403
         assert 'Apenas administradores' in str(exc_info.value.detail)
 
-    def test_verify_admin_access_fails_for_nonexistent_user(self, test_db):
+    async def test_verify_admin_access_fails_for_nonexistent_user(self, async_test_db):
         """Testar que usuário inexistente falha na verificação"""
         nonexistent_user_id = 999
 
         with pytest.raises(HTTPException) as exc_info:
-            verify_admin_access(nonexistent_user_id, test_db)
+            await verify_admin_access(nonexistent_user_id, async_test_db)
 
         assert exc_info.value.status_code == 404
         assert 'Usuário não encontrado' in str(exc_info.value.detail)
 
+    async def test_load_current_user_uses_cache(self, async_test_db, create_test_user):
+        """Testar que o usuário carregado é reaproveitado do cache até ser invalidado"""
+        user = create_test_user(is_admin=True)
+
+        first = await load_current_user(user.id, async_test_db)
+        await async_test_db.execute(update(User).where(User.id == user.id).values(is_admin=False))
+        await async_test_db.commit()
+        cached = await load_current_user(user.id, async_test_db)
+
+        assert cached == first
+        assert cached.is_admin is True
+
+        current_user_cache.invalidate(user.id)
+        reloaded = await load_current_user(user.id, async_test_db)
+
+        assert reloaded.is_admin is False
+
+    async def test_load_current_user_missing_returns_none(self, async_test_db):
+        """Testar que usuário inexistente não é colocado em cache"""
+        assert await load_current_user(999, async_test_db) is None
+        assert current_user_cache.get(999) is None
+
 
 @pytest.mark.unit
 @pytest.mark.auth
@@ -0,0 +1,134 @@
+"""
+Testes unitários para o cache do cardápio
+"""
+import gzip
+import json
+
+import pytest
+
+from src.utils.menu_cache import MENU_GZIP_MIN_SIZE, MenuCache, etag_matches, serialize_menu
+
+
+@pytest.mark.unit
+@pytest.mark.items
+class TestMenuCache:
+    """Testes para o cache versionado do cardápio"""
+
+    def test_set_and_get(self):
+        """Testar que um valor gravado é devolvido"""
+        cache = MenuCache()
+        cache.set(('menu', None), ['pizza'], cache.version)
+
+        assert cache.get(('menu', None)) == ['pizza']
+        assert cache.get(('menu', 'bebida')) is None
+
+    def test_invalidate_clears_entries_and_bumps_version(self):
+        """Testar que invalidar descarta as entradas e muda a versão"""
+        cache = MenuCache()
+        cache.set('key', 'value', cache.version)
+        version = cache.version
+
+        cache.invalidate()
+
+        assert cache.get('key') is None
+        assert cache.version == version + 1
+
+    def test_stale_version_is_not_stored(self):
+        """Testar que uma leitura iniciada antes da invalidação não é guardada"""
+        cache = MenuCache()
+        version_at_read = cache.version
+        cache.invalidate()
+
+        value = cache.set('key', 'old menu', version_at_read)
+
+        assert value == 'old menu'
+        assert cache.get('key') is None
+
+    def test_expired_entry_is_discarded(self):
+        """Testar que entradas expiradas não são devolvidas"""
+        cache = MenuCache(ttl_seconds=-1)
+        cache.set('key', 'value', cache.version)
+
+        assert cache.get('key') is None
+
+    def test_max_entries_discards_oldest(self):
+        """Testar que o limite de entradas descarta a mais antiga"""
+        cache = MenuCache(max_entries=2)
+        for page in range(3):
+            cache.set(('menu', page), page, cache.version)
+
+        assert cache.get(('menu', 0)) is None
+        assert cache.get(('menu', 1)) == 1
+        assert cache.get(('menu', 2)) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.items
+class TestEtagMatches:
+    """Testes para comparação do cabeçalho If-None-Match"""
+
+    def test_exact_match(self):
+        """Testar ETag idêntica"""
+        assert etag_matches('"abc-1-1"', '"abc-1-1"')
+
+    def test_list_and_weak_match(self):
+        """Testar lista de ETags e prefixo fraco W/"""
+        assert etag_matches('"other", W/"abc-1-1"', '"abc-1-1"')
+
+    def test_wildcard_match(self):
+        """Testar curinga *"""
+        assert etag_matches('*', '"abc-1-1"')
+
+    def test_no_match(self):
+        """Testar ETags diferentes ou cabeçalho ausente"""
+        assert not etag_matches('"abc-1-2"', '"abc-1-1"')
+        assert not etag_matches(None, '"abc-1-1"')
+
+
+@pytest.mark.unit
+@pytest.mark.items
+class TestSerializeMenu:
+    """Testes para a serialização antecipada do cardápio"""
+
+    def make_item(self, item_id, description='Molho de tomate e mozzarella'):
+        """Método auxiliar para montar um item no formato do ItemResponse"""
+        return {
+            'id': item_id,
+            'name': f'Pizza {item_id}',
+            'description': description,
+            'category': 'pizza',
+            'size': 'media',
+            'price': 35.9,
+            'is_available': True,
+            'created_at': '2024-01-01T12:00:00',
+            'updated_at': '2024-01-01T12:00:00',
+        }
+
+    def test_small_menu_is_not_gzipped(self):
+        """Testar que payloads pequenos não ganham versão comprimida"""
+        payload = serialize_menu([self.make_item(1)])
+
+        assert payload.gzip_body is None
+        assert json.loads(payload.body)[0]['name'] == 'Pizza 1'
+
+    def test_etag_stable_for_same_menu(self):
+        """Testar que o mesmo cardápio gera a mesma ETag (outros workers e recargas após o TTL)"""
+        first = serialize_menu([self.make_item(1), self.make_item(2)])
+        refill = serialize_menu([self.make_item(1), self.make_item(2)])
+
+        assert refill.etag == first.etag
+        assert first.etag.startswith('"') and first.etag.endswith('"')
+
+    def test_etag_changes_with_menu(self):
+        """Testar que qualquer alteração no cardápio gera outra ETag"""
+        first = serialize_menu([self.make_item(1)])
+        changed = serialize_menu([self.make_item(1, 'Nova descrição')])
+
+        assert changed.etag != first.etag
+
+    def test_gzip_body_matches_plain_body(self):
+        """Testar que a versão comprimida descomprime para os mesmos bytes"""
+        payload = serialize_menu([self.make_item(i, 'x' * 100) for i in range(10)])
+
+        assert len(payload.body) >= MENU_GZIP_MIN_SIZE
+        assert gzip.decompress(payload.gzip_body) == payload.body
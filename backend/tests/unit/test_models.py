@@ -88,7 +88,7 @@ class TestItemModel:
         assert item.id is not None
         assert item.name == 'Pizza Margherita'
         assert item.description == 'Pizza tradicional com molho de tomate, mozzarella e manjericão'
-        assert item.price == 25.90
+        assert item.price == Decimal('25.90')
         assert item.category == CategoryType.PIZZA
         assert item.size == SizeType.MEDIA
         assert item.is_available is True
@@ -119,8 +119,8 @@ class TestItemModel:
         test_db.commit()
         test_db.refresh(item)
 
-        # Verificar precisão do preço
-        assert item.price == 5.99
+        # Verificar precisão do preço (centavos exatos)
+        assert item.price == Decimal('5.99')
 
     @pytest.mark.unit
     @pytest.mark.items
@@ -164,8 +164,8 @@ class TestOrderModel:
         assert order.customer_phone == '11999999999'
         assert order.delivery_address == 'Rua das Flores, 123'
         assert order.payment_method == 'pix'
-        assert order.subtotal == 51.80
-        assert order.total_amount == 51.80
+        assert order.subtotal == Decimal('51.80')
+        assert order.total_amount == Decimal('51.80')
         assert order.status == 'pendente'  # Status padrão
         assert order.user_id == user.id
 
@@ -0,0 +1,59 @@
+"""
+Testes unitários para os valores monetários em centavos
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select, text
+
+from src.models import Item
+from src.models.item import CategoryType, SizeType
+from src.utils.money import from_cents, to_cents, to_money
+
+
+@pytest.mark.unit
+class TestMoneyConversions:
+    """Testes para a conversão entre reais e centavos"""
+
+    def test_to_cents_accepts_decimal_int_and_float(self):
+        """Testar a conversão de cada tipo aceito para centavos"""
+        assert to_cents(Decimal('25.90')) == 2590
+        assert to_cents(7) == 700
+        assert to_cents(10.1) == 1010
+        assert to_cents(0.29) == 29
+
+    def test_to_cents_rounds_half_cent_up(self):
+        """Testar que meio centavo é arredondado para cima"""
+        assert to_cents(Decimal('1.005')) == 101
+        assert to_cents(Decimal('1.004')) == 100
+
+    def test_from_cents_has_two_places(self):
+        """Testar que os centavos voltam como Decimal com 2 casas"""
+        assert str(from_cents(1000)) == '10.00'
+        assert str(from_cents(0)) == '0.00'
+        assert to_money(0.1) * 3 == Decimal('0.30')
+
+
+@pytest.mark.unit
+@pytest.mark.items
+class TestMoneyColumn:
+    """Testes para o tipo de coluna Money"""
+
+    def test_value_stored_as_integer_cents(self, test_db):
+        """Testar que o preço é gravado como inteiro em centavos e lido como Decimal"""
+        item = Item(name='Refrigerante', price=5.99, category=CategoryType.BEBIDA, size=SizeType.ML_350)
+        test_db.add(item)
+        test_db.commit()
+
+        assert test_db.execute(text('SELECT price FROM items WHERE id = :id'), {'id': item.id}).scalar() == 599
+        test_db.expire(item)
+        assert item.price == Decimal('5.99')
+
+    def test_sum_is_exact(self, test_db):
+        """Testar que somar valores no banco não acumula erro de ponto flutuante"""
+        for i in range(10):
+            test_db.add(Item(name=f'Item {i}', price=0.1, category=CategoryType.BEBIDA, size=SizeType.UNICO))
+        test_db.commit()
+
+        assert test_db.scalar(select(func.sum(Item.price))) == Decimal('1.00')
+        assert test_db.scalar(select(Item.id).where(Item.price == Decimal('0.10')).limit(1)) is not None
@@ -0,0 +1,66 @@
+"""
+Testes unitários para a paginação por cursor
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+
+from src.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, set_next_cursor
+
+
+class Row:
+    """Linha mínima com os campos usados pelo cursor"""
+
+    def __init__(self, row_id):
+        self.id = row_id
+        self.created_at = datetime(2024, 1, 1, 12, 0, row_id)
+
+
+@pytest.mark.unit
+class TestCursor:
+    """Testes para codificação do cursor"""
+
+    def test_round_trip(self):
+        """Testar que o cursor decodifica para os mesmos valores"""
+        created_at = datetime(2024, 5, 17, 18, 30, 12, 123456)
+
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_cursor_is_url_safe(self):
+        """Testar que o cursor pode ser usado direto na query string"""
+        cursor = encode_cursor(datetime(2024, 5, 17), 7)
+
+        assert all(c.isalnum() or c in '-_' for c in cursor)
+
+    @pytest.mark.parametrize('cursor', ['nao-e-um-cursor', 'e30', encode_cursor(datetime(2024, 1, 1), 1)[:-4]])
+    def test_invalid_cursor_raises_400(self, cursor):
+        """Testar que cursores malformados resultam em 400"""
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor)
+
+        assert exc_info.value.status_code == 400
+
+
+@pytest.mark.unit
+class TestSetNextCursor:
+    """Testes para o cabeçalho da próxima página"""
+
+    def test_extra_row_sets_header(self):
+        """Testar que a linha extra é removida e vira o cursor da próxima página"""
+        response = Response()
+        rows = [Row(3), Row(2), Row(1)]
+
+        page = set_next_cursor(response, rows, limit=2)
+
+        assert [row.id for row in page] == [3, 2]
+        assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == (rows[1].created_at, 2)
+
+    def test_last_page_has_no_header(self):
+        """Testar que a última página não publica cursor"""
+        response = Response()
+
+        page = set_next_cursor(response, [Row(1)], limit=2)
+
+        assert len(page) == 1
+        assert NEXT_CURSOR_HEADER not in response.headers
@@ -0,0 +1,59 @@
+"""
+Testes unitários para o pool dedicado ao bcrypt
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.config.security import hash_password_async, verify_password_async
+from src.utils.password_hashing import PasswordHashingPool
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+class TestPasswordHashingPool:
+    """Testes para execução, métricas e contrapressão do pool"""
+
+    async def test_run_returns_result_off_event_loop(self):
+        """Testar que a função roda em uma thread do pool e devolve o resultado"""
+        pool = PasswordHashingPool(workers=1, max_queue=0)
+
+        thread_name = await pool.run(lambda: threading.current_thread().name)
+
+        assert thread_name.startswith('password-hash')
+        assert pool.stats() == {
+            'workers': 1,
+            'max_queue': 0,
+            'in_flight': 0,
+            'queued': 0,
+            'completed': 1,
+            'rejected': 0,
+        }
+
+    async def test_saturated_pool_rejects_with_503(self):
+        """Testar que, com threads e fila ocupadas, a próxima chamada recebe 503 sem esperar"""
+        pool = PasswordHashingPool(workers=1, max_queue=1)
+        release = threading.Event()
+
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert pool.in_flight == 2
+        assert pool.queued == 1
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(release.wait)
+
+        release.set()
+        await asyncio.gather(*running)
+        assert exc_info.value.status_code == 503
+        assert pool.rejected == 1
+        assert pool.in_flight == 0
+
+    async def test_async_password_helpers(self):
+        """Testar hash e verificação assíncronos"""
+        hashed = await hash_password_async('testpassword123')
+
+        assert await verify_password_async('testpassword123', hashed)
+        assert not await verify_password_async('wrongpassword', hashed)
@@ -0,0 +1,83 @@
+"""
+Testes unitários para o cache de access tokens verificados
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from src.config import security
+from src.config.security import ALGORITHM, SECRET_KEY, decode_access_token
+from src.utils.token_cache import TokenCache, access_token_cache
+
+
+def make_token(user_id=1, minutes=30):
+    """Access token assinado com a chave da aplicação"""
+    payload = {'sub': str(user_id), 'type': 'access', 'exp': datetime.utcnow() + timedelta(minutes=minutes)}
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+class TestTokenCache:
+    """Testes para o LRU de tokens verificados"""
+
+    def test_set_and_get(self):
+        """Testar que as claims ficam disponíveis até o exp"""
+        cache = TokenCache()
+        cache.set('token', 'claims', time.time() + 60)
+
+        assert cache.get('token') == 'claims'
+        assert cache.get('outro') is None
+
+    def test_expired_token_is_discarded(self):
+        """Testar que tokens expirados saem do cache"""
+        cache = TokenCache()
+        cache.set('token', 'claims', time.time() - 1)
+
+        assert cache.get('token') is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Testar que, cheio, o cache descarta o token usado há mais tempo"""
+        cache = TokenCache(max_entries=2)
+        expires_at = time.time() + 60
+        cache.set('a', 1, expires_at)
+        cache.set('b', 2, expires_at)
+        cache.get('a')
+        cache.set('c', 3, expires_at)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+class TestDecodeAccessTokenCache:
+    """Testes para o uso do cache na verificação do access token"""
+
+    def test_second_decode_skips_verification(self, monkeypatch):
+        """Testar que o mesmo token não é verificado de novo"""
+        token = make_token(user_id=41)
+        first = decode_access_token(token)
+
+        def fail(*args, **kwargs):
+            raise AssertionError('o token não deveria ser verificado de novo')
+
+        monkeypatch.setattr(security.token_service, 'decode', fail)
+
+        assert decode_access_token(token) == first
+        assert first.user_id == 41
+
+    def test_invalid_token_is_not_cached(self):
+        """Testar que tokens rejeitados continuam rejeitados e não entram no cache"""
+        token = make_token()[:-2] + 'xx'
+
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                decode_access_token(token)
+
+        assert access_token_cache.get(token) is None
@@ -0,0 +1,71 @@
+"""
+Testes unitários para a lista de revogação dos access tokens
+"""
+import pytest
+
+from src.models import User
+from src.utils.token_revocation import TokenRevocationList
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+class TestTokenRevocationList:
+    """Testes para a versão de segurança mínima por usuário"""
+
+    def test_unknown_user_is_current(self):
+        """Testar que usuários sem revogação aceitam qualquer versão"""
+        revocations = TokenRevocationList()
+
+        assert revocations.is_current(1, 1)
+
+    def test_revoke_rejects_older_versions(self):
+        """Testar que a revogação rejeita apenas versões anteriores"""
+        revocations = TokenRevocationList()
+
+        revocations.revoke(1, 3)
+
+        assert not revocations.is_current(1, 2)
+        assert revocations.is_current(1, 3)
+        assert revocations.is_current(2, 1)
+
+    def test_revoke_never_lowers_version(self):
+        """Testar que uma sincronização atrasada não desfaz uma revogação mais recente"""
+        revocations = TokenRevocationList()
+
+        revocations.revoke(1, 3)
+        revocations.revoke(1, 2)
+
+        assert not revocations.is_current(1, 2)
+
+    def test_reset_forgets_revocations(self):
+        """Testar que reset descarta as revogações"""
+        revocations = TokenRevocationList()
+        revocations.revoke(1, 3)
+
+        revocations.reset()
+
+        assert revocations.is_current(1, 1)
+
+    async def test_first_refresh_loads_changed_users(self, async_test_db, create_test_user, test_db):
+        """Testar que a primeira sincronização carrega os usuários com versão alterada"""
+        user = create_test_user()
+        test_db.query(User).filter(User.id == user.id).update({User.security_version: 2})
+        test_db.commit()
+        revocations = TokenRevocationList(refresh_seconds=60)
+
+        await revocations.refresh_if_due(async_test_db)
+
+        assert not revocations.is_current(user.id, 1)
+        assert revocations.is_current(user.id, 2)
+
+    async def test_refresh_respects_interval(self, async_test_db, create_test_user, test_db):
+        """Testar que o banco só é consultado quando o intervalo expira"""
+        user = create_test_user()
+        revocations = TokenRevocationList(refresh_seconds=60)
+        await revocations.refresh_if_due(async_test_db)
+
+        test_db.query(User).filter(User.id == user.id).update({User.security_version: 2})
+        test_db.commit()
+        await revocations.refresh_if_due(async_test_db)
+
+        assert revocations.is_current(user.id, 1)
@@ -0,0 +1,112 @@
+"""
+Testes unitários para o serviço de tokens e seus backends
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+
+from src.utils.token_service import BACKENDS, TokenError, TokenService
+
+SECRET = 'chave-de-teste'
+
+
+def available_backends():
+    """Backends com dependências instaladas (PyJWT é opcional)"""
+    names = []
+    for name in BACKENDS:
+        try:
+            TokenService(SECRET, 'HS256', backend=name)
+        except RuntimeError:
+            continue
+        names.append(name)
+    return names
+
+
+@pytest.fixture(params=available_backends())
+def service(request):
+    """Serviço de tokens com cada backend disponível"""
+    return TokenService(SECRET, 'HS256', backend=request.param)
+
+
+def b64(data):
+    """Segmento base64url de um JSON, para montar tokens à mão"""
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+class TestTokenService:
+    """Testes comuns a todos os backends"""
+
+    def test_round_trip_converts_datetime_claims(self, service):
+        """Testar que o payload volta igual, com exp convertido para timestamp"""
+        expiration = datetime.utcnow().replace(microsecond=0) + timedelta(minutes=5)
+
+        payload = service.decode(service.encode({'sub': '1', 'type': 'access', 'exp': expiration, 'adm': True}))
+
+        assert payload['sub'] == '1'
+        assert payload['adm'] is True
+        assert payload['exp'] == int((expiration - datetime(1970, 1, 1)).total_seconds())
+
+    def test_interoperates_with_jose(self, service):
+        """Testar que tokens de um backend são aceitos pelo python-jose e vice-versa"""
+        claims = {'sub': '2', 'exp': datetime.utcnow() + timedelta(minutes=5)}
+
+        assert service.decode(jwt.encode(claims, SECRET, algorithm='HS256'))['sub'] == '2'
+        assert jwt.decode(service.encode(claims), SECRET, algorithms=['HS256'])['sub'] == '2'
+
+    def test_expired_token_fails(self, service):
+        """Testar que token expirado é rejeitado"""
+        token = service.encode({'sub': '1', 'exp': datetime.utcnow() - timedelta(minutes=1)})
+
+        with pytest.raises(TokenError):
+            service.decode(token)
+
+    def test_wrong_key_fails(self, service):
+        """Testar que token assinado com outra chave é rejeitado"""
+        token = jwt.encode({'sub': '1'}, 'outra-chave', algorithm='HS256')
+
+        with pytest.raises(TokenError):
+            service.decode(token)
+
+    @pytest.mark.parametrize(
+        'token',
+        [
+            'nao-e-um-token',
+            'a.b.c',
+            f"{b64({'alg': 'none', 'typ': 'JWT'})}.{b64({'sub': '1'})}.",
+        ],
+    )
+    def test_malformed_or_unsigned_token_fails(self, service, token):
+        """Testar que tokens malformados ou sem assinatura (alg none) são rejeitados"""
+        with pytest.raises(TokenError):
+            service.decode(token)
+
+    def test_tampered_payload_fails(self, service):
+        """Testar que alterar o payload invalida a assinatura"""
+        header, _, signature = service.encode({'sub': '1', 'adm': False}).split('.')
+        token = f"{header}.{b64({'sub': '1', 'adm': True})}.{signature}"
+
+        with pytest.raises(TokenError):
+            service.decode(token)
+
+
+@pytest.mark.unit
+@pytest.mark.auth
+class TestTokenServiceConfiguration:
+    """Testes para a escolha do backend"""
+
+    def test_unknown_backend_fails(self):
+        """Testar que um JWT_BACKEND desconhecido é recusado na inicialização"""
+        with pytest.raises(ValueError):
+            TokenService(SECRET, 'HS256', backend='inexistente')
+
+    def test_hmac_backend_rejects_other_algorithm_header(self):
+        """Testar que o backend hmac só aceita o algoritmo configurado"""
+        token = jwt.encode({'sub': '1'}, SECRET, algorithm='HS512')
+
+        with pytest.raises(TokenError):
+            TokenService(SECRET, 'HS256', backend='hmac').decode(token)
@@ -0,0 +1,44 @@
+"""
+Testes unitários para o cache com TTL
+"""
+import pytest
+
+from src.utils.ttl_cache import TTLCache
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    """Testes para o cache genérico com expiração e versão"""
+
+    def test_set_and_get(self):
+        """Testar que um valor gravado é devolvido até expirar"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set('stats', {'total': 1}, cache.version)
+
+        assert cache.get('stats') == {'total': 1}
+        assert cache.get('other') is None
+
+    def test_expired_entry_is_discarded(self):
+        """Testar que entradas expiradas não são devolvidas"""
+        cache = TTLCache(ttl_seconds=-1)
+        cache.set('stats', 1, cache.version)
+
+        assert cache.get('stats') is None
+
+    def test_stale_version_is_not_stored(self):
+        """Testar que uma leitura iniciada antes da invalidação não é guardada"""
+        cache = TTLCache(ttl_seconds=60)
+        version_at_read = cache.version
+        cache.invalidate()
+
+        assert cache.set('stats', 'old', version_at_read) == 'old'
+        assert cache.get('stats') is None
+
+    def test_max_entries_discards_oldest(self):
+        """Testar que o limite de entradas descarta a mais antiga"""
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        for key in range(3):
+            cache.set(key, key, cache.version)
+
+        assert cache.get(0) is None
+        assert cache.get(2) == 2
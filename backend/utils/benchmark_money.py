@@ -0,0 +1,70 @@
+"""
+Benchmark do cálculo dos totais de um pedido: conversões Decimal(str(float)) e safe_float
+por linha (caminho antigo) x valores já em Decimal vindos da coluna Money (caminho novo)
+
+Uso:
+    python backend/utils/benchmark_money.py --lines 20 --orders 20000
+"""
+import argparse
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.money import ZERO, to_cents, to_money
+
+
+def safe_float(value, decimal_places=2):
+    """Conversão usada antes pelas rotas de pedidos"""
+    if isinstance(value, Decimal):
+        return float(round(value, decimal_places))
+    return float(round(Decimal(str(value)), decimal_places))
+
+
+def legacy_totals(lines):
+    """Caminho antigo: preços float convertidos por string a cada linha e de volta para float"""
+    subtotal = Decimal('0.00')
+    for price, quantity in lines:
+        unit_price = Decimal(str(price))
+        item_subtotal = unit_price * Decimal(str(quantity))
+        subtotal += item_subtotal
+        safe_float(unit_price), safe_float(item_subtotal)
+    return float(subtotal)
+
+
+def money_totals(lines):
+    """Caminho novo: preços já em Decimal com 2 casas, multiplicados direto pela quantidade"""
+    subtotal = ZERO
+    for price, quantity in lines:
+        subtotal += price * quantity
+    return to_cents(subtotal)
+
+
+def run_path(totals, orders):
+    """Calcular os totais de todos os pedidos e devolver microssegundos por pedido"""
+    start = time.perf_counter()
+    for lines in orders:
+        totals(lines)
+    return (time.perf_counter() - start) * 1_000_000 / len(orders)
+
+
+def main(lines, orders):
+    prices = [round(random.uniform(5, 80), 2) for _ in range(50)]
+    float_orders = [[(random.choice(prices), random.randint(1, 5)) for _ in range(lines)] for _ in range(orders)]
+    money_orders = [[(to_money(price), quantity) for price, quantity in order] for order in float_orders]
+
+    print(f'{orders} pedidos com {lines} linhas\n')
+    print(f"{'Decimal(str(float))':22s} {run_path(legacy_totals, float_orders):8.2f} µs/pedido")
+    print(f"{'Money (Decimal)':22s} {run_path(money_totals, money_orders):8.2f} µs/pedido")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=20, help='Linhas por pedido')
+    parser.add_argument('--orders', type=int, default=20000, help='Pedidos calculados')
+    args = parser.parse_args()
+
+    main(args.lines, args.orders)
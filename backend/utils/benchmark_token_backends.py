@@ -0,0 +1,51 @@
+"""
+Microbenchmark dos backends do serviço de tokens (utils/token_service.py):
+assinatura e verificação de um access token típico em cada implementação disponível
+
+Uso:
+    python backend/utils/benchmark_token_backends.py --iterations 20000
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config.security import ALGORITHM, SECRET_KEY
+from src.utils.token_service import BACKENDS, TokenService
+
+
+def main(iterations):
+    payload = {
+        'sub': '42',
+        'exp': datetime.utcnow() + timedelta(minutes=30),
+        'type': 'access',
+        'usr': 'cliente',
+        'adm': False,
+        'act': True,
+        'sv': 1,
+    }
+
+    print(f'{iterations} repetições por operação\n')
+    print(f"{'backend':8s} {'encode':>14s} {'decode':>14s}")
+    for name in BACKENDS:
+        try:
+            service = TokenService(SECRET_KEY, ALGORITHM, backend=name)
+        except RuntimeError as exc:
+            print(f'{name:8s} indisponível: {exc}')
+            continue
+
+        token = service.encode(payload)
+        encode = min(timeit.repeat(lambda: service.encode(payload), number=iterations, repeat=3))
+        decode = min(timeit.repeat(lambda: service.decode(token), number=iterations, repeat=3))
+        print(f'{name:8s} {encode * 1_000_000 / iterations:9.2f} µs/op {decode * 1_000_000 / iterations:9.2f} µs/op')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000, help='Repetições de cada operação')
+    args = parser.parse_args()
+
+    main(args.iterations)
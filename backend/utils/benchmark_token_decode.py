@@ -0,0 +1,65 @@
+"""
+Benchmark da verificação do access token: jwt.decode a cada requisição (caminho antigo)
+x cache LRU dos tokens já verificados (decode_access_token)
+
+Simula clientes fazendo polling: cada token é reenviado várias vezes.
+
+Uso:
+    python backend/utils/benchmark_token_decode.py --tokens 100 --requests 50000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jose import jwt
+
+from src.config.security import ALGORITHM, SECRET_KEY, decode_access_token
+from src.utils.token_cache import access_token_cache
+
+
+def legacy_decode(token):
+    """Caminho antigo: verificação HMAC e leitura das claims em toda requisição"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    return int(payload['sub'])
+
+
+def cached_decode(token):
+    """Caminho novo: verificação só na primeira vez, depois consulta ao cache"""
+    return decode_access_token(token).user_id
+
+
+def run_path(decode, requests):
+    """Verificar a sequência de tokens e devolver microssegundos por requisição"""
+    start = time.perf_counter()
+    for token in requests:
+        decode(token)
+    return (time.perf_counter() - start) * 1_000_000 / len(requests)
+
+
+def main(tokens, requests):
+    expiration = datetime.utcnow() + timedelta(minutes=30)
+    claims = {'exp': expiration, 'type': 'access', 'adm': False, 'act': True, 'sv': 1}
+    issued = [
+        jwt.encode({**claims, 'sub': str(user_id), 'usr': f'user{user_id}'}, SECRET_KEY, algorithm=ALGORITHM)
+        for user_id in range(1, tokens + 1)
+    ]
+    sequence = [random.choice(issued) for _ in range(requests)]
+
+    print(f'{requests} requisições com {tokens} tokens distintos\n')
+    access_token_cache.invalidate()
+    for name, decode in (('jwt.decode sempre', legacy_decode), ('cache de tokens', cached_decode)):
+        print(f'{name:20s} {run_path(decode, sequence):8.2f} µs/requisição')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=100, help='Tokens distintos (clientes)')
+    parser.add_argument('--requests', type=int, default=50000, help='Requisições simuladas')
+    args = parser.parse_args()
+
+    main(args.tokens, args.requests)